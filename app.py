@@ -1,15 +1,28 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import plotly.express as px
-import plotly.graph_objects as go
 import time
 import os
 import base64
+import hashlib
+from functools import lru_cache
 from streamlit_extras.stylable_container import stylable_container
 from PIL import Image
 from io import BytesIO
+import catalog
+import charts
+import metrics
+import profiling
+import sessions
+import validation
+from validation import SPEC_LIMITS
+from drift import PSI_ALERT, PSI_WARNING, DriftMonitor, build_reference
+from feature_importance import load_importance
+from scoring import FEATURE_LIST, NUMERICAL_FEATURES, PRICE_RANGES, RAW_FEATURES, engineer_features
+import scoring
+import shadow
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from uuid import uuid4
 
 # App configuration 
 st.set_page_config(
@@ -19,19 +32,122 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Opt-in request profiling (see profiling.py)
+@st.cache_resource
+def load_profiler():
+    return profiling.from_environment()
+
+profiler = load_profiler()
+
+# Admins force profiling of their own requests with ?profile=<MOBICOST_PROFILE_TOKEN>
+def profile_requested():
+    return profiler.authorised(st.query_params.get("profile"))
+
 # Load the trained model and scaler
 @st.cache_resource
 def load_model():
-    model = joblib.load('phone_price_model.pkl')
-    scaler = joblib.load('scaler.pkl')
+    with profiler.profile("load_model", force=profile_requested()), metrics.MODEL_LOAD_SECONDS.time():
+        model, scaler = scoring.load_model()
     return model, scaler
 
 model, scaler = load_model()
 
+# Expose Prometheus metrics once per process (set MOBICOST_METRICS_PORT=0 to disable)
+@st.cache_resource
+def start_metrics_exporter():
+    port = int(os.environ.get("MOBICOST_METRICS_PORT", "9464"))
+    if not port:
+        return None
+    try:
+        return metrics.start_http_server(port, os.environ.get("MOBICOST_METRICS_ADDR", "127.0.0.1"))
+    except OSError as e:
+        # Another replica on this host already owns the port
+        print(f"Metrics exporter disabled: {e}")
+        return None
+
+start_metrics_exporter()
+metrics.SCRIPT_RUNS.inc()
+
+# One drift monitor per process, compared against the dataset.csv profile
+@st.cache_resource
+def load_drift_monitor():
+    return DriftMonitor(build_reference()).register_metrics()
+
+drift_monitor = load_drift_monitor()
+
+# Catalog scores shared by every session, keyed by spec hash and model version
+@st.cache_resource
+def load_score_store():
+    max_rows = int(os.environ.get("MOBICOST_SCORE_STORE_ROWS", catalog.DEFAULT_MAX_ROWS))
+    return catalog.ScoreStore(max_rows).register_metrics(), scoring.model_version()
+
+score_store, model_version = load_score_store()
+
+# Distilled lite model for fast mode; missing until distill.py has been run
+@st.cache_resource
+def load_lite_model():
+    if not os.path.exists(scoring.LITE_MODEL_PATH):
+        return None
+    return scoring.LiteModel.load()
+
+lite_model = load_lite_model()
+
+# Optional candidate model scored in the background (see shadow.py)
+@st.cache_resource
+def load_shadow_scorer():
+    return shadow.from_environment((model, scaler))
+
+shadow_scorer = load_shadow_scorer()
+
+# Stable per-session id used for A/B assignment
+def current_session_id():
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        return ctx.session_id
+    return st.session_state.setdefault('_session_id', uuid4().hex)
+
+# Cross-session payload cache plus per-session memory accounting and idle
+# expiry (see sessions.py)
+@st.cache_resource
+def load_session_tracker():
+    shared_cache = sessions.SharedCache(int(os.environ.get("MOBICOST_SHARED_CACHE_MB", "256")) * 2 ** 20)
+    tracker = sessions.SessionTracker(
+        int(os.environ.get("MOBICOST_SESSION_IDLE_SECONDS", sessions.DEFAULT_IDLE_SECONDS))
+    )
+    return tracker.register_metrics(shared_cache).start(), shared_cache
+
+session_tracker, shared_cache = load_session_tracker()
+session_tracker.touch(current_session_id())
+
+# This session's spec record, created with the slider defaults on first use
+def current_spec():
+    spec = st.session_state.get(sessions.SPEC_KEY)
+    if spec is None:
+        spec = st.session_state[sessions.SPEC_KEY] = sessions.new_spec()
+    return spec
+
+# Starting value of a spec slider or checkbox. Widgets have fixed keys, so once
+# one has state (from the browser or a Quick Start) the record is not consulted.
+def spec_default(spec, name):
+    if sessions.widget_key(name) in st.session_state:
+        return None
+    return sessions.spec_value(spec, name)
+
+# Load Quick Start specs into the record and move the widgets to them
+def quick_start(values):
+    spec = sessions.update_spec(current_spec(), values)
+    for name in RAW_FEATURES:
+        st.session_state[sessions.widget_key(name)] = sessions.spec_value(spec, name)
+
 # Function to load images with error handling
 def load_image(image_path):
+    with profiler.profile("load_image", force=profile_requested()), metrics.IMAGE_LOAD_SECONDS.time():
+        return _load_image(image_path)
+
+def _load_image(image_path):
     try:
         if image_path.startswith("http"):
+            metrics.IMAGE_LOADS.inc(source="url")
             return image_path
         
         # Get absolute path to image
@@ -39,25 +155,32 @@ def load_image(image_path):
         full_path = os.path.join(base_dir, image_path)
         
         if os.path.exists(full_path):
-            # Read image and convert to base64
-            with open(full_path, "rb") as img_file:
-                encoded_string = base64.b64encode(img_file.read()).decode()
-            return f"data:image/png;base64,{encoded_string}"
+            metrics.IMAGE_LOADS.inc(source="file")
+            return image_data_uri(full_path)
         else:
             # Generate a placeholder image
-            img = Image.new('RGB', (200, 200), color=(45, 60, 80))
-            buffered = BytesIO()
-            img.save(buffered, format="PNG")
-            encoded_string = base64.b64encode(buffered.getvalue()).decode()
-            return f"data:image/png;base64,{encoded_string}"
+            metrics.IMAGE_LOADS.inc(source="placeholder")
+            return placeholder_data_uri()
     except Exception as e:
+        metrics.IMAGE_LOADS.inc(source="error")
         st.error(f"Error loading image: {e}")
         # Generate placeholder on error
-        img = Image.new('RGB', (200, 200), color=(45, 60, 80))
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        encoded_string = base64.b64encode(buffered.getvalue()).decode()
-        return f"data:image/png;base64,{encoded_string}"
+        return placeholder_data_uri()
+
+# Base64 data URIs are encoded once per process and shared by every session
+@lru_cache(maxsize=64)
+def image_data_uri(full_path):
+    with open(full_path, "rb") as img_file:
+        encoded_string = base64.b64encode(img_file.read()).decode()
+    return f"data:image/png;base64,{encoded_string}"
+
+@lru_cache(maxsize=1)
+def placeholder_data_uri():
+    img = Image.new('RGB', (200, 200), color=(45, 60, 80))
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    encoded_string = base64.b64encode(buffered.getvalue()).decode()
+    return f"data:image/png;base64,{encoded_string}"
 
 # Enhanced CSS with improved visibility
 st.markdown("""
@@ -152,7 +275,7 @@ st.markdown("""
     }
     
     /* Modern button styling with larger text */
-    .stButton>button {
+    .stButton>button, .stFormSubmitButton>button {
         background: linear-gradient(45deg, #4da6ff, #1a8cff);
         color: white !important;
         border-radius: 14px;
@@ -165,7 +288,7 @@ st.markdown("""
         transition: all 0.3s ease;
     }
     
-    .stButton>button:hover {
+    .stButton>button:hover, .stFormSubmitButton>button:hover {
         transform: translateY(-3px);
         box-shadow: 0 8px 25px rgba(77, 166, 255, 0.6);
     }
@@ -397,14 +520,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Price range mapping
-PRICE_RANGES = {
-    0: "Budget",
-    1: "Mid-Range",
-    2: "Premium",
-    3: "Luxury"
-}
-
 PRICE_COLORS = {
     0: "#10b981",  # Emerald
     1: "#f59e0b",  # Amber
@@ -451,17 +566,13 @@ POPULAR_MODELS = {
     ]
 }
 
-# Feature list used in the trained model
-FEATURE_LIST = [
-    'battery_power', 'blue', 'clock_speed', 'dual_sim', 'fc', 'four_g',
-    'int_memory', 'mobile_wt', 'n_cores', 'pc', 'ram', 'sc_h', 'sc_w',
-    'talk_time', 'three_g', 'touch_screen', 'wifi', 'pixel_density',
-    'screen_area', 'camera_total'
-]
+# Feature importance from the permutation importance job (feature_importance.py),
+# falling back to the figures from the original notebook run when the artifact
+# is missing or belongs to another model version
+@st.cache_data
+def load_feature_importance():
+    return load_importance(version=model_version) or FEATURE_IMPORTANCE
 
-NUMERICAL_FEATURES = ['battery_power', 'ram', 'pixel_density', 'screen_area', 'int_memory', 'camera_total']
-
-# Feature importance from trained model
 FEATURE_IMPORTANCE = {
     'RAM': 0.348145,
     'Battery': 0.097577,
@@ -538,6 +649,165 @@ def generate_realistic_values(price_range):
             'talk_time': np.random.randint(20, 30)
         }
 
+# Record how long a prediction stage took and return the start time of the next one
+def record_stage(stage, stage_start):
+    now = time.perf_counter()
+    metrics.PREDICTION_LATENCY.observe(now - stage_start, stage=stage)
+    return now
+
+# Sidebar summary of how incoming specs compare with the training data
+def render_drift_panel():
+    scores = drift_monitor.scores()
+    with st.sidebar.expander("📈 Input drift", expanded=False):
+        if not scores:
+            st.caption("No predictions yet")
+            return
+        drift_df = pd.DataFrame([
+            {
+                'Feature': feature,
+                'PSI': s['psi'],
+                'Shift (sd)': s['mean_shift'],
+                'Out of range': s['out_of_range_rate'],
+            }
+            for feature, s in scores.items()
+        ]).sort_values('PSI', ascending=False)
+        alerts = (drift_df['PSI'] >= PSI_ALERT).sum()
+        moderate = ((drift_df['PSI'] >= PSI_WARNING) & (drift_df['PSI'] < PSI_ALERT)).sum()
+        st.caption(f"{max(s['count'] for s in scores.values())} specs scored · {alerts} major / {moderate} moderate shifts")
+        st.dataframe(
+            drift_df.style.format({'PSI': '{:.3f}', 'Shift (sd)': '{:+.2f}', 'Out of range': '{:.0%}'}),
+            hide_index=True,
+            use_container_width=True
+        )
+
+# Sidebar summary of current vs. candidate model agreement
+def render_shadow_panel():
+    if shadow_scorer is None:
+        return
+    stats = shadow_scorer.stats()
+    with st.sidebar.expander("🧪 Shadow model", expanded=False):
+        st.caption(f"A/B split: {shadow_scorer.split:.0%} of sessions served by the candidate · {stats['pending']} pending")
+        rows = []
+        for arm in (shadow.CURRENT, shadow.CANDIDATE, 'all'):
+            s = stats[arm]
+            if s['count']:
+                rows.append({
+                    'Served by': arm,
+                    'Requests': s['count'],
+                    'Tier agreement': s['agreement'],
+                    'Mean |Δp|': s['mean_abs_shift'],
+                })
+        if not rows:
+            st.caption("No shadow comparisons yet")
+            return
+        st.dataframe(
+            pd.DataFrame(rows).style.format({'Tier agreement': '{:.1%}', 'Mean |Δp|': '{:.3f}'}),
+            hide_index=True,
+            use_container_width=True
+        )
+        confusion = pd.DataFrame(
+            stats['all']['confusion'],
+            index=[f"current: {PRICE_RANGES[i]}" for i in PRICE_RANGES],
+            columns=[f"candidate: {PRICE_RANGES[i]}" for i in PRICE_RANGES]
+        )
+        st.dataframe(confusion, use_container_width=True)
+
+# Upload, rank, filter and page through a catalog of phones. Re-uploads only
+# rescore rows whose specs changed; only the current page is sent to the browser.
+@st.fragment
+def catalog_panel():
+    metrics.FRAGMENT_RUNS.inc(fragment="catalog_panel")
+    session_tracker.touch(current_session_id())
+    st.markdown('<div class="section-title">CATALOG COMPARISON</div>', unsafe_allow_html=True)
+    uploaded = st.file_uploader(
+        "Upload a catalog (CSV)",
+        type=["csv"],
+        help=f"One phone per row with the columns: {', '.join(RAW_FEATURES)}"
+    )
+    if uploaded is None:
+        st.caption("Upload a catalog to rank its phones by predicted tier and confidence")
+        return
+    
+    # The session keeps only a content key; the scored frame lives in the
+    # shared cache, so identical uploads from several sessions share one copy
+    state = st.session_state.get(sessions.CATALOG_KEY)
+    if state is None or state['file_id'] != uploaded.file_id:
+        content_hash = hashlib.sha256(uploaded.getvalue()).hexdigest()
+        state = st.session_state[sessions.CATALOG_KEY] = {
+            'file_id': uploaded.file_id,
+            'key': ('catalog', model_version, content_hash),
+            'rescored': 0,
+            'seconds': 0.0,
+        }
+    cached = shared_cache.get(state['key'])
+    if cached is None:
+        with st.spinner("📋 Scoring catalog..."):
+            uploaded.seek(0)
+            df = pd.read_csv(uploaded)
+            try:
+                df, report = validation.Validator().validate_frame(df)
+            except ValueError as e:
+                st.error(f"The catalog can't be scored: {e}")
+                return
+            if not len(df):
+                st.error("No phone in the catalog passed validation")
+                return
+            start = time.perf_counter()
+            scored, rescored = catalog.score_catalog(df, model, scaler, score_store, model_version)
+            cached = shared_cache.put(state['key'], (scored, report))
+            state['rescored'] = rescored
+            state['seconds'] = time.perf_counter() - start
+    scored, report = cached
+    st.caption(
+        f"{len(scored):,} phones · {state['rescored']:,} scored by the model, "
+        f"{len(scored) - state['rescored']:,} reused from earlier uploads · {state['seconds']:.2f}s"
+    )
+    if len(report):
+        rejected = int(report['rejected'].sum())
+        st.warning(
+            f"{rejected:,} rows rejected and {len(report) - rejected:,} rows normalised during validation"
+        )
+        with st.expander("Validation report"):
+            shown = report.head(1000)
+            st.dataframe(
+                pd.DataFrame({
+                    'Row': shown['row'] + 1,
+                    'Status': np.where(shown['rejected'], 'rejected', 'normalised'),
+                    'Issues': validation.describe(shown),
+                }),
+                hide_index=True,
+                use_container_width=True
+            )
+    st.dataframe(
+        catalog.tier_summary(scored).style.format({'Mean confidence': '{:.1%}'}),
+        hide_index=True,
+        use_container_width=True
+    )
+    
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    with col1:
+        tiers = st.multiselect("Tiers", list(PRICE_RANGES.values()), placeholder="All tiers")
+    with col2:
+        min_confidence = st.slider("Minimum confidence", 0.0, 1.0, 0.0, step=0.05)
+    with col3:
+        sort_by = st.selectbox("Sort by", ['confidence'] + RAW_FEATURES)
+    with col4:
+        descending = st.toggle("Descending", value=True)
+    
+    col1, col2 = st.columns([1, 4])
+    with col1:
+        page_size = st.selectbox("Rows per page", catalog.PAGE_SIZES, index=1)
+    with col2:
+        page_number = st.number_input("Page", min_value=1, value=1, step=1)
+    rows, matching, pages = catalog.page(
+        scored, tiers, min_confidence, sort_by, descending, int(page_number), page_size
+    )
+    st.dataframe(
+        rows.style.format({'confidence': '{:.1%}'}),
+        use_container_width=True
+    )
+    st.caption(f"Page {min(int(page_number), pages)} of {pages} · {matching:,} matching phones")
+
 # Main app
 def main():
     # Clean header with animation
@@ -549,125 +819,186 @@ def main():
         </div>
         """, unsafe_allow_html=True)
     
+    mode = st.sidebar.radio("Mode", ["📱 Single phone", "📋 Catalog"], horizontal=True)
+    if mode == "📋 Catalog":
+        catalog_panel()
+        # Input drift since this process started; in single-phone mode
+        # prediction_panel() renders these so PREDICT refreshes them
+        render_drift_panel()
+        render_shadow_panel()
+    else:
+        single_phone()
+    
+    # Footer
+    st.markdown("---")
+    st.markdown("""
+    <div class="footer">
+        <div style="font-size: 1.25rem; font-weight: 600;">MobiCost Analyzer: Smartphone Value Forecaster © 2025</div>
+        <div style="margin-top: 0.5rem;">Developed by Ankit Parwatkar | Data Scientist </div>
+        <div class="social-links">
+            <a href="https://www.linkedin.com/in/ankitparwatkar" target="_blank" title="LinkedIn">
+                <i class="fab fa-linkedin"></i>
+            </a>
+            <a href="https://github.com/ankitparwatkar" target="_blank" title="GitHub">
+                <i class="fab fa-github"></i>
+            </a>
+            <a href="https://twitter.com/ankitparwatkar" target="_blank" title="Twitter">
+                <i class="fab fa-twitter"></i>
+            </a>
+            <a href="https://share.streamlit.io/user/ankitparwatkar" target="_blank" title="Portfolio">
+                <i class="fas fa-globe"></i>
+            </a>
+        </div>
+        <div style="margin-top: 1.5rem; font-size: 1.05rem; color: #94a3b8;">
+            This tool provides estimates based on market trends and specifications
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Add Font Awesome for icons
+    st.markdown("""
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
+    """, unsafe_allow_html=True)
+
+# Quick start buttons plus the prediction form
+def single_phone():
     # Quick start buttons
     st.markdown('<div class="section-title">QUICK START</div>', unsafe_allow_html=True)
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         if st.button("💰 Budget Phone", use_container_width=True, help="Generate realistic specs for a budget phone"):
             values = generate_realistic_values(0)
-            st.session_state.update(values)
+            quick_start(values)
     with col2:
         if st.button("💸 Mid-Range Phone", use_container_width=True, help="Generate realistic specs for a mid-range phone"):
             values = generate_realistic_values(1)
-            st.session_state.update(values)
+            quick_start(values)
     with col3:
         if st.button("💳 Premium Phone", use_container_width=True, help="Generate realistic specs for a premium phone"):
             values = generate_realistic_values(2)
-            st.session_state.update(values)
+            quick_start(values)
     with col4:
         if st.button("🏦 Luxury Phone", use_container_width=True, help="Generate realistic specs for a luxury phone"):
             values = generate_realistic_values(3)
-            st.session_state.update(values)
+            quick_start(values)
+    
+    # Inputs and results rerun on their own, without the header, styles and footer
+    prediction_panel()
+
+# Input form and results. Sliders live in a form, so moving them doesn't rerun
+# anything; PREDICT reruns only this fragment.
+@st.fragment
+def prediction_panel():
+    metrics.FRAGMENT_RUNS.inc(fragment="prediction_panel")
+    session_tracker.touch(current_session_id())
+    spec = current_spec()
     
     # Create input form using tabs for better organization
-    with st.container():
+    with st.form("spec_form", border=False):
         tab1, tab2, tab3 = st.tabs(["🔋 Battery & Memory", "📸 Display & Camera", "⚙️ Connectivity & Features"])
         
         with tab1:
             st.markdown('<div class="feature-label">BATTERY & POWER</div>', unsafe_allow_html=True)
-            battery_power = st.slider("Battery Power (mAh)", 500, 7000, 
-                                      st.session_state.get('battery_power', 3500), 
+            battery_power = st.slider("Battery Power (mAh)", *SPEC_LIMITS['battery_power'], 
+                                      spec_default(spec, 'battery_power'), key=sessions.widget_key('battery_power'),
                                       help="Total energy storage capacity")
             
             st.markdown('<div class="feature-label" style="margin-top: 1.8rem;">MEMORY</div>', unsafe_allow_html=True)
             col1, col2 = st.columns(2)
             with col1:
-                int_memory = st.slider("Internal Memory (GB)", 2, 1024, 
-                                       st.session_state.get('int_memory', 128), 
+                int_memory = st.slider("Internal Memory (GB)", *SPEC_LIMITS['int_memory'], 
+                                       spec_default(spec, 'int_memory'), key=sessions.widget_key('int_memory'),
                                        help="Storage capacity for apps and files")
             with col2:
-                ram = st.slider("RAM (MB)", 500, 16000, 
-                                st.session_state.get('ram', 4000), 
+                ram = st.slider("RAM (MB)", *SPEC_LIMITS['ram'], 
+                                spec_default(spec, 'ram'), key=sessions.widget_key('ram'),
                                 help="Memory for active applications")
         
         with tab2:
             st.markdown('<div class="feature-label">DISPLAY RESOLUTION</div>', unsafe_allow_html=True)
             col1, col2 = st.columns(2)
             with col1:
-                px_height = st.slider("Pixel Height", 0, 3000, 
-                                      st.session_state.get('px_height', 1440), 
+                px_height = st.slider("Pixel Height", *SPEC_LIMITS['px_height'], 
+                                      spec_default(spec, 'px_height'), key=sessions.widget_key('px_height'),
                                       help="Vertical screen resolution")
             with col2:
-                px_width = st.slider("Pixel Width", 0, 4000, 
-                                     st.session_state.get('px_width', 2560), 
+                px_width = st.slider("Pixel Width", *SPEC_LIMITS['px_width'], 
+                                     spec_default(spec, 'px_width'), key=sessions.widget_key('px_width'),
                                      help="Horizontal screen resolution")
             
             st.markdown('<div class="feature-label" style="margin-top: 1.8rem;">SCREEN SIZE</div>', unsafe_allow_html=True)
             col1, col2 = st.columns(2)
             with col1:
-                sc_h = st.slider("Screen Height (cm)", 5, 25, 
-                                 st.session_state.get('sc_h', 15), 
+                sc_h = st.slider("Screen Height (cm)", *SPEC_LIMITS['sc_h'], 
+                                 spec_default(spec, 'sc_h'), key=sessions.widget_key('sc_h'),
                                  help="Physical screen height")
             with col2:
-                sc_w = st.slider("Screen Width (cm)", 5, 15, 
-                                 st.session_state.get('sc_w', 8), 
+                sc_w = st.slider("Screen Width (cm)", *SPEC_LIMITS['sc_w'], 
+                                 spec_default(spec, 'sc_w'), key=sessions.widget_key('sc_w'),
                                  help="Physical screen width")
             
             st.markdown('<div class="feature-label" style="margin-top: 1.8rem;">CAMERA SYSTEM</div>', unsafe_allow_html=True)
             col1, col2 = st.columns(2)
             with col1:
-                pc = st.slider("Primary Camera (MP)", 0, 200, 
-                               st.session_state.get('pc', 48), 
+                pc = st.slider("Primary Camera (MP)", *SPEC_LIMITS['pc'], 
+                               spec_default(spec, 'pc'), key=sessions.widget_key('pc'),
                                help="Main camera resolution")
             with col2:
-                fc = st.slider("Front Camera (MP)", 0, 100, 
-                               st.session_state.get('fc', 16), 
+                fc = st.slider("Front Camera (MP)", *SPEC_LIMITS['fc'], 
+                               spec_default(spec, 'fc'), key=sessions.widget_key('fc'),
                                help="Selfie camera resolution")
         
         with tab3:
             st.markdown('<div class="feature-label">PERFORMANCE</div>', unsafe_allow_html=True)
             col1, col2 = st.columns(2)
             with col1:
-                clock_speed = st.slider("Clock Speed (GHz)", 0.5, 5.0, 
-                                        st.session_state.get('clock_speed', 2.5), 
+                clock_speed = st.slider("Clock Speed (GHz)", *SPEC_LIMITS['clock_speed'], 
+                                        spec_default(spec, 'clock_speed'), key=sessions.widget_key('clock_speed'),
                                         step=0.1, format="%.1f",
                                         help="Processor speed")
             with col2:
-                n_cores = st.slider("Processor Cores", 1, 16, 
-                                    st.session_state.get('n_cores', 8), 
+                n_cores = st.slider("Processor Cores", *SPEC_LIMITS['n_cores'], 
+                                    spec_default(spec, 'n_cores'), key=sessions.widget_key('n_cores'),
                                     help="Number of CPU cores")
             
             st.markdown('<div class="feature-label" style="margin-top: 1.8rem;">PHYSICAL ATTRIBUTES</div>', unsafe_allow_html=True)
             col1, col2 = st.columns(2)
             with col1:
-                mobile_wt = st.slider("Weight (grams)", 80, 300, 
-                                      st.session_state.get('mobile_wt', 180), 
+                mobile_wt = st.slider("Weight (grams)", *SPEC_LIMITS['mobile_wt'], 
+                                      spec_default(spec, 'mobile_wt'), key=sessions.widget_key('mobile_wt'),
                                       help="Device weight")
             with col2:
-                talk_time = st.slider("Talk Time (hours)", 2, 40, 
-                                      st.session_state.get('talk_time', 18), 
+                talk_time = st.slider("Talk Time (hours)", *SPEC_LIMITS['talk_time'], 
+                                      spec_default(spec, 'talk_time'), key=sessions.widget_key('talk_time'),
                                       help="Battery life during calls")
             
             st.markdown('<div class="feature-label" style="margin-top: 1.8rem;">CONNECTIVITY</div>', unsafe_allow_html=True)
             col1, col2, col3 = st.columns(3)
             with col1:
-                blue = st.checkbox("Bluetooth", value=st.session_state.get('blue', True))
-                four_g = st.checkbox("4G", value=st.session_state.get('four_g', True))
+                blue = st.checkbox("Bluetooth", value=spec_default(spec, 'blue'), key=sessions.widget_key('blue'))
+                four_g = st.checkbox("4G", value=spec_default(spec, 'four_g'), key=sessions.widget_key('four_g'))
             with col2:
-                dual_sim = st.checkbox("Dual SIM", value=st.session_state.get('dual_sim', True))
-                three_g = st.checkbox("3G", value=st.session_state.get('three_g', True))
+                dual_sim = st.checkbox("Dual SIM", value=spec_default(spec, 'dual_sim'), key=sessions.widget_key('dual_sim'))
+                three_g = st.checkbox("3G", value=spec_default(spec, 'three_g'), key=sessions.widget_key('three_g'))
             with col3:
-                wifi = st.checkbox("WiFi", value=st.session_state.get('wifi', True))
-                touch_screen = st.checkbox("Touch Screen", value=st.session_state.get('touch_screen', True))
-    
-    # Prediction button
-    st.markdown("---")
-    predict_btn = st.button("**PREDICT PRICE RANGE**", use_container_width=True, type="primary")
+                wifi = st.checkbox("WiFi", value=spec_default(spec, 'wifi'), key=sessions.widget_key('wifi'))
+                touch_screen = st.checkbox("Touch Screen", value=spec_default(spec, 'touch_screen'), key=sessions.widget_key('touch_screen'))
+        
+        # Prediction button
+        st.markdown("---")
+        fast_mode = st.toggle(
+            "⚡ Fast mode",
+            value=False,
+            disabled=lite_model is None,
+            help="Use the distilled lite model: about 93% agreement with the full model at a fraction of the latency"
+        )
+        predict_btn = st.form_submit_button("**PREDICT PRICE RANGE**", use_container_width=True, type="primary")
     
     # Placeholder for results
     result_placeholder = st.empty()
     
-    if predict_btn:
+    # PREDICT branch as a function, so the profiler wraps it without re-indenting
+    def predict_and_render():
         # Show loading animation with progress bar
         with st.spinner("🔍 Analyzing phone specifications..."):
             progress_bar = st.progress(0)
@@ -676,54 +1007,94 @@ def main():
                 progress_bar.progress(percent_complete + 1)
             
             # Collect inputs
-            features = {
-                'battery_power': battery_power,
-                'blue': int(blue),
-                'clock_speed': clock_speed,
-                'dual_sim': int(dual_sim),
-                'fc': fc,
-                'four_g': int(four_g),
-                'int_memory': int_memory,
-                'mobile_wt': mobile_wt,
-                'n_cores': n_cores,
-                'pc': pc,
-                'ram': ram,
-                'sc_h': sc_h,
-                'sc_w': sc_w,
-                'talk_time': talk_time,
-                'three_g': int(three_g),
-                'touch_screen': int(touch_screen),
-                'wifi': int(wifi),
-                'px_height': px_height,
-                'px_width': px_width
-            }
+            stage = "features"
+            stage_start = time.perf_counter()
+            try:
+                features = {
+                    'battery_power': battery_power,
+                    'blue': int(blue),
+                    'clock_speed': clock_speed,
+                    'dual_sim': int(dual_sim),
+                    'fc': fc,
+                    'four_g': int(four_g),
+                    'int_memory': int_memory,
+                    'mobile_wt': mobile_wt,
+                    'n_cores': n_cores,
+                    'pc': pc,
+                    'ram': ram,
+                    'sc_h': sc_h,
+                    'sc_w': sc_w,
+                    'talk_time': talk_time,
+                    'three_g': int(three_g),
+                    'touch_screen': int(touch_screen),
+                    'wifi': int(wifi),
+                    'px_height': px_height,
+                    'px_width': px_width
+                }
+            
+                # Feature engineering
+                engineer_features(features)
+                out_of_range = drift_monitor.update(features)
             
-            # Feature engineering
-            features['pixel_density'] = features['px_width'] * features['px_height']
-            features['screen_area'] = features['sc_w'] * features['sc_h']
-            features['camera_total'] = features['pc'] + features['fc']
+                row = np.array([features[f] for f in FEATURE_LIST], dtype=float)
+                stage_start = record_stage(stage, stage_start)
             
-            # Create input DataFrame with correct feature order
-            input_df = pd.DataFrame([features])[FEATURE_LIST]
+                if fast_mode:
+                    # The lite model scores unscaled features with one matrix product
+                    stage = "predict_lite"
+                    probabilities = lite_model.predict_proba(row)[0]
+                    prediction = int(np.argmax(probabilities))
+                    stage_start = record_stage(stage, stage_start)
+                else:
+                    # Create input DataFrame with correct feature order
+                    stage = "scale"
+                    input_df = pd.DataFrame([features])[FEATURE_LIST]
             
-            # Scale numerical features
-            input_df[NUMERICAL_FEATURES] = scaler.transform(input_df[NUMERICAL_FEATURES])
+                    # Scale numerical features
+                    input_df[NUMERICAL_FEATURES] = scaler.transform(input_df[NUMERICAL_FEATURES])
+                    stage_start = record_stage(stage, stage_start)
             
-            # Make prediction
-            prediction = model.predict(input_df)[0]
-            probabilities = model.predict_proba(input_df)[0]
+                    # Make prediction
+                    stage = "predict"
+                    arm = shadow_scorer.arm_for(current_session_id()) if shadow_scorer else shadow.CURRENT
+                    if arm == shadow.CANDIDATE:
+                        probabilities = shadow_scorer.predict_proba(arm, [row])[0]
+                        prediction = int(np.argmax(probabilities))
+                    else:
+                        prediction = model.predict(input_df)[0]
+                        probabilities = model.predict_proba(input_df)[0]
+                    stage_start = record_stage(stage, stage_start)
+                    if shadow_scorer:
+                        shadow_scorer.submit(features, probabilities, arm)
             
-            price_range = PRICE_RANGES[prediction]
-            color = PRICE_COLORS[prediction]
-            icon = PRICE_ICONS[prediction]
+                price_range = PRICE_RANGES[prediction]
+                color = PRICE_COLORS[prediction]
+                icon = PRICE_ICONS[prediction]
+            except Exception:
+                metrics.PREDICTION_ERRORS.inc(stage=stage)
+                raise
+            metrics.PREDICTIONS.inc(tier=price_range)
             
-            # Store values in session state
-            st.session_state.update(features)
+            # Remember the raw specs for when the widgets are rebuilt, e.g. after
+            # catalog mode
+            sessions.update_spec(spec, features)
             
             # Display results with animation
             with result_placeholder.container():
                 st.markdown("---")
                 
+                # Flag specs the model never saw during training
+                range_note = ""
+                if out_of_range:
+                    outside = ", ".join(
+                        f"{feature} ({drift_monitor.reference[feature]['min']:g}–{drift_monitor.reference[feature]['max']:g})"
+                        for feature in out_of_range
+                    )
+                    range_note = f"""
+                    <div style="font-size: 1.1rem; color: #f59e0b; margin-top: 1.2rem;">
+                        ⚠️ Outside the training range, so this is an extrapolation: {outside}
+                    </div>"""
+                
                 # Prediction card with animation
                 st.markdown(f"""
                 <div class="result-card">
@@ -731,40 +1102,13 @@ def main():
                     <div class="result-value">{icon} {price_range}</div>
                     <div style="font-size: 1.4rem; color: #d1e0f0; margin-top: 1.2rem;">
                         Confidence: {probabilities[prediction]*100:.1f}%
-                    </div>
+                    </div>{range_note}
                 </div>
                 """, unsafe_allow_html=True)
                 
                 # Confidence visualization
-                fig = go.Figure(go.Indicator(
-                    mode = "gauge+number",
-                    value = probabilities[prediction] * 100,
-                    domain = {'x': [0, 1], 'y': [0, 1]},
-                    title = {'text': "Prediction Confidence", 'font': {'size': 24}},
-                    gauge = {
-                        'axis': {'range': [0, 100], 'tickfont': {'size': 16}},
-                        'bar': {'color': color},
-                        'steps': [
-                            {'range': [0, 50], 'color': "rgba(30, 45, 65, 0.8)"},
-                            {'range': [50, 100], 'color': "rgba(30, 45, 65, 0.6)"}
-                        ],
-                        'threshold': {
-                            'line': {'color': "white", 'width': 4},
-                            'thickness': 0.75,
-                            'value': probabilities[prediction] * 100
-                        }
-                    }
-                ))
-                
-                fig.update_layout(
-                    height=350,
-                    margin=dict(l=0, r=0, t=80, b=0),
-                    font=dict(color="white", size=18),
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)'
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+                with charts.confidence_gauge(probabilities[prediction] * 100, color) as fig:
+                    st.plotly_chart(fig, use_container_width=True)
                 
                 # Popular models section
                 st.markdown('<div class="section-title">POPULAR MODELS IN THIS RANGE</div>', unsafe_allow_html=True)
@@ -795,48 +1139,10 @@ def main():
             # Feature impact visualization
             st.markdown('<div class="section-title">FEATURE IMPACT ANALYSIS</div>', unsafe_allow_html=True)
             
-            # Create a DataFrame for feature importances
-            feature_impact = pd.DataFrame({
-                'Feature': list(FEATURE_IMPORTANCE.keys()),
-                'Impact': list(FEATURE_IMPORTANCE.values())
-            })
-            
-            # Create an interactive radial chart
-            fig = go.Figure()
-
-            fig.add_trace(go.Scatterpolar(
-                r=feature_impact['Impact'],
-                theta=feature_impact['Feature'],
-                fill='toself',
-                name='Feature Impact',
-                line=dict(color=color, width=3),
-                hoverinfo='r+theta',
-                marker=dict(size=10)
-            ))
-
-            fig.update_layout(
-                polar=dict(
-                    radialaxis=dict(
-                        visible=True,
-                        range=[0, 0.4],
-                        tickfont=dict(color='white', size=16),
-                        gridcolor='rgba(255, 255, 255, 0.15)',
-                        tickvals=[0, 0.1, 0.2, 0.3, 0.4]
-                    ),
-                    angularaxis=dict(
-                        tickfont=dict(color='white', size=16),
-                        gridcolor='rgba(255, 255, 255, 0.15)'
-                    ),
-                    bgcolor='rgba(0,0,0,0)'
-                ),
-                showlegend=False,
-                height=450,
-                margin=dict(l=60, r=60, t=60, b=60),
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white', size=14)
-            )
-            
+            # Interactive radial chart, shared by every prediction in this tier
+            fig = charts.feature_impact(tuple(load_feature_importance().items()), color)
             st.plotly_chart(fig, use_container_width=True)
+            stage_start = record_stage("render", stage_start)
             
             # Recommendations based on price range
             st.markdown('<div class="section-title">MARKETING RECOMMENDATIONS</div>', unsafe_allow_html=True)
@@ -921,36 +1227,14 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
     
-    # Footer
-    st.markdown("---")
-    st.markdown("""
-    <div class="footer">
-        <div style="font-size: 1.25rem; font-weight: 600;">MobiCost Analyzer: Smartphone Value Forecaster © 2025</div>
-        <div style="margin-top: 0.5rem;">Developed by Ankit Parwatkar | Data Scientist </div>
-        <div class="social-links">
-            <a href="https://www.linkedin.com/in/ankitparwatkar" target="_blank" title="LinkedIn">
-                <i class="fab fa-linkedin"></i>
-            </a>
-            <a href="https://github.com/ankitparwatkar" target="_blank" title="GitHub">
-                <i class="fab fa-github"></i>
-            </a>
-            <a href="https://twitter.com/ankitparwatkar" target="_blank" title="Twitter">
-                <i class="fab fa-twitter"></i>
-            </a>
-            <a href="https://share.streamlit.io/user/ankitparwatkar" target="_blank" title="Portfolio">
-                <i class="fas fa-globe"></i>
-            </a>
-        </div>
-        <div style="margin-top: 1.5rem; font-size: 1.05rem; color: #94a3b8;">
-            This tool provides estimates based on market trends and specifications
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    if predict_btn:
+        with profiler.profile("predict", force=profile_requested()):
+            predict_and_render()
     
-    # Add Font Awesome for icons
-    st.markdown("""
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    """, unsafe_allow_html=True)
+    # Sidebar panels belong to this fragment, so they include the prediction
+    # just made (a fragment's sidebar writes are redrawn on each of its reruns)
+    render_drift_panel()
+    render_shadow_panel()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,94 @@
+# Arrow IPC / Parquet record-batch I/O for batch scoring
+#
+# Batches are read straight into the float64 matrix the model consumes: each
+# numeric column without nulls is exposed as a zero-copy NumPy view and copied
+# once into its matrix column, with no text parsing and no per-row Python
+# objects. Results go back out as Arrow columns wrapping the NumPy result
+# arrays, and every batch is written as soon as it is scored, so memory stays
+# bounded by the batch size. The format follows the file suffix.
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+ARROW_SUFFIXES = ('.arrow', '.arrows', '.feather', '.ipc')
+
+
+def file_format(path):
+    lower = path.lower()
+    if lower.endswith(PARQUET_SUFFIXES):
+        return 'parquet'
+    if lower.endswith(ARROW_SUFFIXES):
+        return 'arrow'
+    return 'csv'
+
+
+def _ipc_batches(path):
+    source = pa.memory_map(path)
+    try:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+    except pa.ArrowInvalid:
+        # Not the random-access file format; read it as an IPC stream
+        source.seek(0)
+        yield from pa.ipc.open_stream(source)
+
+
+# Record batches of at most `batch_size` rows from a Parquet, Arrow IPC (file
+# or stream) or CSV file. CSV columns in `text_columns` are read as strings:
+# Arrow infers the other types from the first block and fails the whole read
+# on a later value that doesn't fit, before a validator could see it.
+def read_batches(path, batch_size=50000, text_columns=()):
+    fmt = file_format(path)
+    if fmt == 'parquet':
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_size)
+        return
+    if fmt == 'arrow':
+        batches = _ipc_batches(path)
+    else:
+        convert_options = pa_csv.ConvertOptions(column_types={name: pa.string() for name in text_columns})
+        batches = pa_csv.open_csv(path, convert_options=convert_options)
+    for batch in batches:
+        # Slicing is zero-copy
+        for offset in range(0, batch.num_rows, batch_size):
+            yield batch.slice(offset, batch_size)
+
+
+# NumPy view of a column; copies only when Arrow's layout differs from NumPy's
+# (nulls become NaN, booleans are unpacked from bits)
+def column_array(batch, name):
+    return batch.column(name).to_numpy(zero_copy_only=False)
+
+
+# Writes record batches to Parquet, Arrow IPC or CSV by suffix; the schema is
+# taken from the first batch
+class BatchWriter:
+    def __init__(self, path):
+        self.path = path
+        self.format = file_format(path)
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, batch):
+        if self._writer is None:
+            if self.format == 'parquet':
+                self._writer = pq.ParquetWriter(self.path, batch.schema)
+            elif self.format == 'arrow':
+                self._writer = pa.ipc.new_file(self.path, batch.schema)
+            else:
+                self._writer = pa_csv.CSVWriter(self.path, batch.schema)
+        if self.format == 'parquet':
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write(batch)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
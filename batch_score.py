@@ -0,0 +1,192 @@
+# Batch scoring of spec catalogs
+#
+#   python batch_score.py catalog.csv predictions.csv [--chunksize 50000]
+#                         [--drift-report drift.json] [--metrics-port 9465] [--fast]
+#                         [--on-out-of-range clip|reject] [--error-report errors.csv]
+#
+# The input needs the raw spec columns listed in scoring.RAW_FEATURES. The
+# output keeps the input columns and adds price_range, price_label,
+# confidence, prob_0..prob_3 and out_of_range (1 when any feature lies outside
+# the training data range). --fast scores with the distilled lite model.
+#
+# Input and output may be CSV, Parquet (.parquet/.pq) or Arrow IPC
+# (.arrow/.feather/.ipc). When either side isn't CSV, scoring streams Arrow
+# record batches through arrow_io instead of pandas chunks.
+#
+# Every chunk passes through validation.Validator before scoring: units and
+# text values are normalised, out-of-range specs are clipped (or their rows
+# rejected), and rows with missing or unparseable specs are left out of the
+# output. --error-report lists each flagged input row (0-based) with its issues.
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import metrics
+from arrow_io import BatchWriter, column_array, file_format, read_batches
+from drift import PSI_ALERT, PSI_WARNING, DriftMonitor, build_reference
+from validation import Validator, describe
+from scoring import (FEATURE_LIST, PRICE_RANGES, RAW_FEATURES, LiteModel, engineer_features, feature_matrix,
+                     load_model, predict, predict_lite, predict_matrix)
+
+PRICE_LABELS = pa.array([PRICE_RANGES[i] for i in sorted(PRICE_RANGES)])
+
+
+def score_chunk(model, scaler, chunk, monitor=None, lite_model=None):
+    missing = [f for f in RAW_FEATURES if f not in chunk]
+    if missing:
+        raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+    if lite_model is not None:
+        with metrics.PREDICTION_LATENCY.time(stage="batch_lite"):
+            prediction, probabilities = predict_lite(lite_model, chunk)
+    else:
+        with metrics.PREDICTION_LATENCY.time(stage="batch"):
+            prediction, probabilities = predict(model, scaler, chunk)
+    out = chunk.copy()
+    out['price_range'] = prediction
+    out['price_label'] = [PRICE_RANGES[p] for p in prediction]
+    out['confidence'] = probabilities.max(axis=1)
+    for i in range(probabilities.shape[1]):
+        out[f'prob_{i}'] = probabilities[:, i]
+    if monitor is not None:
+        out['out_of_range'] = monitor.update_batch(engineer_features(chunk.copy())).astype(int)
+    for tier, count in out['price_label'].value_counts().items():
+        metrics.PREDICTIONS.inc(count, tier=tier)
+    return out
+
+
+# Arrow counterpart of score_chunk: record batch in, record batch out
+def score_batch(model, scaler, batch, monitor=None, lite_model=None):
+    missing = [f for f in RAW_FEATURES if f not in batch.schema.names]
+    if missing:
+        raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+    X = feature_matrix({f: column_array(batch, f) for f in RAW_FEATURES})
+    if lite_model is not None:
+        with metrics.PREDICTION_LATENCY.time(stage="batch_lite"):
+            probabilities = lite_model.predict_proba(X)
+            prediction = probabilities.argmax(axis=1)
+    else:
+        with metrics.PREDICTION_LATENCY.time(stage="batch"):
+            prediction, probabilities = predict_matrix(model, scaler, X)
+    columns = {
+        'price_range': pa.array(prediction),
+        'price_label': pa.DictionaryArray.from_arrays(pa.array(prediction.astype(np.int8)), PRICE_LABELS),
+        'confidence': pa.array(probabilities.max(axis=1)),
+    }
+    for i in range(probabilities.shape[1]):
+        columns[f'prob_{i}'] = pa.array(np.ascontiguousarray(probabilities[:, i]))
+    if monitor is not None:
+        specs = pd.DataFrame(X, columns=FEATURE_LIST, copy=False)
+        columns['out_of_range'] = pa.array(monitor.update_batch(specs).astype(np.int64))
+    # Columns already in the input (e.g. a ground-truth price_range, or a
+    # previously scored file) are replaced in place, as score_chunk does
+    out = batch
+    for name, column in columns.items():
+        index = out.schema.get_field_index(name)
+        if index == -1:
+            out = out.append_column(name, column)
+        else:
+            out = out.set_column(index, name, column)
+    for code, count in enumerate(np.bincount(prediction, minlength=len(PRICE_RANGES))):
+        if count:
+            metrics.PREDICTIONS.inc(int(count), tier=PRICE_RANGES[code])
+    return out
+
+
+def write_error_report(report, path, first):
+    pd.DataFrame({
+        'row': report['row'],
+        'status': np.where(report['rejected'], 'rejected', 'normalised'),
+        'issues': describe(report),
+    }).to_csv(path, mode='w' if first else 'a', header=first, index=False)
+
+
+# Score `input_path` into `output_path` chunk by chunk, validating each chunk
+# first when a validator is given; returns the number of rows written
+def score_file(input_path, output_path, model, scaler, chunksize=50000, monitor=None, lite_model=None,
+               validator=None, error_report=None):
+    rows = 0
+    if file_format(input_path) == 'csv' and file_format(output_path) == 'csv':
+        for i, chunk in enumerate(pd.read_csv(input_path, chunksize=chunksize)):
+            if validator is not None:
+                chunk, report = validator.validate_frame(chunk)
+                if error_report:
+                    write_error_report(report, error_report, first=i == 0)
+            if not len(chunk):
+                continue
+            scored = score_chunk(model, scaler, chunk, monitor, lite_model)
+            scored.to_csv(output_path, mode='a' if rows else 'w', header=not rows, index=False)
+            rows += len(scored)
+        return rows
+    with BatchWriter(output_path) as writer:
+        # The validator parses text, so spec columns reach it untyped
+        text_columns = RAW_FEATURES if validator is not None else ()
+        for i, batch in enumerate(read_batches(input_path, chunksize, text_columns)):
+            if validator is not None:
+                batch, report = validator.validate_batch(batch)
+                if error_report:
+                    write_error_report(report, error_report, first=i == 0)
+            if not batch.num_rows:
+                continue
+            scored = score_batch(model, scaler, batch, monitor, lite_model)
+            writer.write(scored)
+            rows += scored.num_rows
+    return rows
+
+
+def format_drift_report(scores):
+    lines = [f"{'feature':<15}{'psi':>8}{'shift(sd)':>11}{'out of range':>14}"]
+    for feature, s in sorted(scores.items(), key=lambda item: -item[1]['psi']):
+        flag = " !!" if s['psi'] >= PSI_ALERT else " !" if s['psi'] >= PSI_WARNING else ""
+        lines.append(f"{feature:<15}{s['psi']:>8.3f}{s['mean_shift']:>11.2f}{s['out_of_range_rate']:>13.1%}{flag}")
+    return "\n".join(lines)
+
+
+def format_validation_summary(validator):
+    lines = [f"Validated {validator.rows} rows, rejected {validator.rejected}"]
+    for issue, features in validator.summary().items():
+        if features:
+            lines.append(f"  {issue}: " + ", ".join(f"{f} {n}" for f, n in sorted(features.items(), key=lambda x: -x[1])))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV, Parquet or Arrow catalog of phone specs")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument("--drift-report", help="write per-feature drift scores to this JSON file")
+    parser.add_argument("--metrics-port", type=int, help="expose Prometheus metrics while the job runs")
+    parser.add_argument("--fast", action="store_true", help="score with the distilled lite model")
+    parser.add_argument("--on-out-of-range", choices=["clip", "reject"], default="clip",
+                        help="clip specs outside the allowed ranges, or drop their rows")
+    parser.add_argument("--error-report", help="write flagged input rows and their issues to this CSV file")
+    args = parser.parse_args(argv)
+
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+
+    model, scaler = load_model()
+    lite_model = LiteModel.load() if args.fast else None
+    monitor = DriftMonitor(build_reference()).register_metrics()
+    validator = Validator(args.on_out_of_range)
+
+    start = time.perf_counter()
+    rows = score_file(args.input, args.output, model, scaler, args.chunksize, monitor, lite_model,
+                      validator, args.error_report)
+    elapsed = time.perf_counter() - start
+
+    scores = monitor.scores()
+    print(f"Scored {rows} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    print(format_validation_summary(validator))
+    print(format_drift_report(scores))
+    if args.drift_report:
+        with open(args.drift_report, 'w') as f:
+            json.dump(scores, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
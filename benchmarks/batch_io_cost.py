@@ -0,0 +1,70 @@
+# End-to-end batch scoring throughput: CSV vs. Parquet vs. Arrow IPC
+#
+#   python benchmarks/batch_io_cost.py [--rows 1000000] [--chunksize 50000] [--fast]
+#
+# Resamples dataset.csv to --rows raw specs, writes the same catalog in each
+# format, then times batch_score.score_file reading and writing that format.
+# Drift monitoring is on, as in the CLI.
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_score import score_file  # noqa: E402
+from drift import DriftMonitor, build_reference  # noqa: E402
+from scoring import RAW_FEATURES, LiteModel, load_model, read_dataset  # noqa: E402
+
+FORMATS = ['csv', 'parquet', 'arrow']
+
+
+def write_catalog(df, path):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if path.endswith('.parquet'):
+        pq.write_table(table, path)
+    elif path.endswith('.arrow'):
+        with pa.ipc.new_file(path, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        df.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare batch scoring throughput across file formats")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument("--fast", action="store_true", help="score with the lite model so I/O dominates")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    model, scaler = load_model()
+    lite_model = LiteModel.load() if args.fast else None
+    reference = build_reference()
+    dataset = read_dataset()[RAW_FEATURES]
+    rng = np.random.default_rng(args.seed)
+    catalog = dataset.iloc[rng.integers(0, len(dataset), args.rows)].reset_index(drop=True)
+
+    print(f"{args.rows:,} rows, chunks of {args.chunksize:,}, {'lite' if args.fast else 'full'} model")
+    print(f"{'format':<10}{'input MiB':>11}{'output MiB':>12}{'seconds':>9}{'rows/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in FORMATS:
+            input_path = os.path.join(tmp, f"catalog.{fmt}")
+            output_path = os.path.join(tmp, f"predictions.{fmt}")
+            write_catalog(catalog, input_path)
+            start = time.perf_counter()
+            rows = score_file(input_path, output_path, model, scaler, args.chunksize,
+                              DriftMonitor(reference), lite_model)
+            elapsed = time.perf_counter() - start
+            print(f"{fmt:<10}{os.path.getsize(input_path) / 2 ** 20:>11.1f}"
+                  f"{os.path.getsize(output_path) / 2 ** 20:>12.1f}{elapsed:>9.2f}{rows / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
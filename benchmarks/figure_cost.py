@@ -0,0 +1,82 @@
+# Figure build + serialisation time per prediction, rebuilt vs. templated
+#
+#   python benchmarks/figure_cost.py [--predictions 500] [--threads 1 4 8]
+#
+# Serialisation mirrors st.plotly_chart (Figure -> dict -> JSON). Model
+# inference for one spec is timed alongside for scale.
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly.io
+import plotly.tools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import charts  # noqa: E402
+from scoring import load_model, prepare_features, read_dataset  # noqa: E402
+
+COLORS = ["#10b981", "#f59e0b", "#ef4444", "#8b5cf6"]
+IMPORTANCE = (('RAM', 0.348145), ('Battery', 0.097577), ('Screen Quality', 0.082037),
+              ('Internal Memory', 0.036340), ('Camera System', 0.034207), ('Processor', 0.028100))
+
+
+def serialise(fig):
+    figure = plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True)
+    return plotly.io.to_json(figure, validate=False)
+
+
+def rebuilt(i):
+    color = COLORS[i % 4]
+    serialise(charts.build_confidence_gauge(50 + i % 50, color))
+    serialise(charts.build_feature_impact(IMPORTANCE, color))
+
+
+def templated(i):
+    color = COLORS[i % 4]
+    with charts.confidence_gauge(50 + i % 50, color) as fig:
+        serialise(fig)
+    serialise(charts.feature_impact(IMPORTANCE, color))
+
+
+def per_prediction_ms(fn, predictions, threads):
+    start = time.perf_counter()
+    if threads == 1:
+        for i in range(predictions):
+            fn(i)
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(fn, range(predictions)))
+    return (time.perf_counter() - start) / predictions * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark results-panel figures")
+    parser.add_argument("--predictions", type=int, default=500)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args(argv)
+
+    model, scaler = load_model()
+    specs = read_dataset().head(200)
+    rows = [specs.iloc[[i]] for i in range(len(specs))]
+
+    def inference(i):
+        model.predict_proba(prepare_features(rows[i % len(rows)], scaler))
+
+    # Warm up caches and the gauge pool
+    for fn in (rebuilt, templated, inference):
+        fn(0)
+
+    print(f"{'threads':>8}{'rebuilt ms':>12}{'templated ms':>14}{'speedup':>9}{'inference ms':>14}")
+    for threads in args.threads:
+        rebuilt_ms = per_prediction_ms(rebuilt, args.predictions, threads)
+        templated_ms = per_prediction_ms(templated, args.predictions, threads)
+        inference_ms = per_prediction_ms(inference, args.predictions, threads)
+        print(f"{threads:>8}{rebuilt_ms:>12.2f}{templated_ms:>14.2f}{rebuilt_ms / templated_ms:>8.1f}x{inference_ms:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# Load test: many concurrent simulated users against one local replica
+#
+#   python benchmarks/loadtest.py [--sessions 1 5 10 25] [--duration 30]
+#                                 [--think exp --think-mean 2] [--json results.json]
+#
+# For each concurrency level a fresh `streamlit run` server is started and N
+# simulated users repeat the same journey until the duration ends: open the
+# page, click a Quick Start button, move a few sliders and press PREDICT,
+# pausing for a think time between actions. Reported per level: completed
+# journeys and server round trips per second, latency percentiles per action,
+# server CPU utilisation and resident memory.
+#
+# Slider moves inside the input form never reach the server, so they cost no
+# latency and aren't counted as round trips. PREDICT latency includes the
+# app's ~1 s progress animation.
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+from rerun_cost import QUICK_START, random_slider_value, user_session
+from streamlit_session import SessionClient, StreamlitServer
+
+THINK_TIMES = {
+    'exp': lambda rng, mean: rng.expovariate(1 / mean),
+    'lognormal': lambda rng, mean: rng.lognormvariate(np.log(mean) - 0.5 * 0.8 ** 2, 0.8),
+    'uniform': lambda rng, mean: rng.uniform(0, 2 * mean),
+    'fixed': lambda rng, mean: mean,
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.journeys = 0
+        self.errors = 0
+
+    def record(self, action, result):
+        if result is not None:
+            self.latencies.setdefault(action, []).append(result.seconds)
+
+
+async def user(url, deadline, rng, recorder, think, think_mean, slider_moves):
+    # Stagger arrivals so sessions don't start in lockstep
+    await asyncio.sleep(rng.uniform(0, think_mean))
+    while time.monotonic() < deadline:
+        client = SessionClient(url)
+        try:
+            recorder.record('page_load', await client.connect())
+            await asyncio.sleep(think(rng, think_mean))
+            recorder.record('quick_start', await client.click(rng.choice(QUICK_START)))
+            for _ in range(slider_moves):
+                await asyncio.sleep(think(rng, think_mean))
+                sliders = [w for w in client.widgets.values() if w.type == 'slider']
+                widget = rng.choice(sliders)
+                recorder.record('slider', await client.set_value(widget.label, random_slider_value(widget, rng)))
+            await asyncio.sleep(think(rng, think_mean))
+            recorder.record('predict', await client.click("PREDICT PRICE RANGE"))
+            recorder.journeys += 1
+        except Exception as e:
+            recorder.errors += 1
+            print(f"session error: {e!r}")
+        finally:
+            await client.close()
+
+
+async def run_level(server, sessions, duration, think, think_mean, slider_moves, seed):
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    users = [
+        user(server.url, deadline, random.Random(seed + i), recorder, think, think_mean, slider_moves)
+        for i in range(sessions)
+    ]
+
+    # Sample RSS while the level runs; report the peak
+    peak_rss = server.rss_bytes()
+
+    async def sample_rss():
+        nonlocal peak_rss
+        while time.monotonic() < deadline:
+            peak_rss = max(peak_rss, server.rss_bytes())
+            await asyncio.sleep(0.5)
+
+    cpu_start, wall_start = server.cpu_seconds(), time.monotonic()
+    await asyncio.gather(sample_rss(), *users)
+    wall = time.monotonic() - wall_start
+    cpu = server.cpu_seconds() - cpu_start
+
+    round_trips = sum(len(values) for values in recorder.latencies.values())
+    return {
+        'sessions': sessions,
+        'wall_seconds': wall,
+        'journeys': recorder.journeys,
+        'errors': recorder.errors,
+        'journeys_per_s': recorder.journeys / wall,
+        'round_trips_per_s': round_trips / wall,
+        'cpu_utilisation': cpu / wall,
+        'cpu_seconds_per_journey': cpu / recorder.journeys if recorder.journeys else None,
+        'peak_rss_mib': peak_rss / 2 ** 20,
+        'latency_ms': {
+            action: {
+                'count': len(values),
+                'p50': float(np.percentile(values, 50) * 1000),
+                'p95': float(np.percentile(values, 95) * 1000),
+                'p99': float(np.percentile(values, 99) * 1000),
+            }
+            for action, values in recorder.latencies.items()
+        },
+    }
+
+
+def print_level(result):
+    print(f"\n== {result['sessions']} concurrent sessions ({result['wall_seconds']:.0f}s) ==")
+    print(f"journeys/s {result['journeys_per_s']:.2f}   round trips/s {result['round_trips_per_s']:.2f}   "
+          f"errors {result['errors']}")
+    print(f"server CPU {result['cpu_utilisation']:.0%} of one core   peak RSS {result['peak_rss_mib']:.0f} MiB")
+    print(f"{'action':<14}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for action, stats in result['latency_ms'].items():
+        print(f"{action:<14}{stats['count']:>7}{stats['p50']:>9.0f}{stats['p95']:>9.0f}{stats['p99']:>9.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent users against a local replica")
+    parser.add_argument("--script", default="app.py")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 25])
+    parser.add_argument("--duration", type=float, default=30, help="seconds per concurrency level")
+    parser.add_argument("--think", choices=sorted(THINK_TIMES), default="exp")
+    parser.add_argument("--think-mean", type=float, default=2.0, help="mean think time in seconds")
+    parser.add_argument("--slider-moves", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for sessions in args.sessions:
+        # A fresh server per level, warmed up so model loading isn't measured
+        with StreamlitServer(args.script, args.port, env={"MOBICOST_METRICS_PORT": "0"}) as server:
+            asyncio.run(user_session(server.url, 0, random.Random(args.seed)))
+            result = asyncio.run(run_level(
+                server, sessions, args.duration, THINK_TIMES[args.think], args.think_mean,
+                args.slider_moves, args.seed
+            ))
+        print_level(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
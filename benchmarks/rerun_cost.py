@@ -0,0 +1,76 @@
+# Script runs and server CPU time per user session
+#
+#   python benchmarks/rerun_cost.py app.py [app_before.py ...] [--sessions 5] [--slider-moves 12]
+#
+# Each session opens the page, clicks a Quick Start button, moves sliders
+# across the three input tabs and presses PREDICT, the way a browser would.
+# To compare with an earlier version of the page, export it next to app.py
+# first (e.g. `git show <rev>:app.py > app_before.py`).
+import argparse
+import asyncio
+import random
+import statistics
+
+from streamlit_session import SessionClient, StreamlitServer
+
+QUICK_START = ["💰 Budget Phone", "💸 Mid-Range Phone", "💳 Premium Phone", "🏦 Luxury Phone"]
+
+
+def random_slider_value(widget, rng):
+    proto = widget.proto
+    steps = int(round((proto.max - proto.min) / proto.step)) if proto.step else 0
+    return proto.min + rng.randint(0, steps) * proto.step if steps else proto.min
+
+
+async def user_session(url, slider_moves, rng):
+    client = SessionClient(url)
+    await client.connect()
+    await client.click(rng.choice(QUICK_START))
+    for _ in range(slider_moves):
+        sliders = [w for w in client.widgets.values() if w.type == 'slider']
+        widget = rng.choice(sliders)
+        await client.set_value(widget.label, random_slider_value(widget, rng))
+    await client.click("PREDICT PRICE RANGE")
+    await client.close()
+    return client.runs
+
+
+def measure(script, sessions, slider_moves, port, seed):
+    rng = random.Random(seed)
+    results = []
+    with StreamlitServer(script, port, env={"MOBICOST_METRICS_PORT": "0"}) as server:
+        # Warm-up session so model loading and caches aren't billed to the first user
+        asyncio.run(user_session(server.url, slider_moves, rng))
+        for _ in range(sessions):
+            cpu = server.cpu_seconds()
+            runs = asyncio.run(user_session(server.url, slider_moves, rng))
+            results.append({
+                'full_runs': sum(not r.fragment for r in runs),
+                'fragment_runs': sum(r.fragment for r in runs),
+                'cpu_seconds': server.cpu_seconds() - cpu,
+                'kib_sent': sum(r.bytes for r in runs) / 1024,
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure script runs and CPU time per session")
+    parser.add_argument("scripts", nargs="+", help="Streamlit scripts relative to the repository root")
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--slider-moves", type=int, default=12)
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'script':<20}{'full runs':>11}{'fragment runs':>15}{'CPU s/session':>15}{'KiB sent':>10}")
+    for script in args.scripts:
+        results = measure(script, args.sessions, args.slider_moves, args.port, args.seed)
+        print(f"{script:<20}"
+              f"{statistics.mean(r['full_runs'] for r in results):>11.1f}"
+              f"{statistics.mean(r['fragment_runs'] for r in results):>15.1f}"
+              f"{statistics.mean(r['cpu_seconds'] for r in results):>15.3f}"
+              f"{statistics.mean(r['kib_sent'] for r in results):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
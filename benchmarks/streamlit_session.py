@@ -0,0 +1,195 @@
+# Minimal Streamlit websocket client that behaves like a browser tab
+#
+# It speaks the same BackMsg/ForwardMsg protocol as the frontend: widget values
+# are resent on every rerun, values of widgets inside a form are held back until
+# the form is submitted, and widgets rendered inside a fragment trigger
+# fragment-scoped reruns. Used by the benchmarks to measure real server work
+# (AppTest always executes the whole script, so it can't see fragment reruns).
+#
+# Needs the `websockets` package (pip install websockets).
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+try:
+    import websockets
+except ImportError:  # pragma: no cover - benchmark-only dependency
+    sys.exit("The benchmarks need the websockets package: pip install websockets")
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WIDGET_TYPES = {'button', 'slider', 'checkbox'}
+
+
+class Widget:
+    __slots__ = ('id', 'type', 'label', 'form_id', 'fragment_id', 'is_form_submitter', 'proto')
+
+    def __init__(self, element_type, proto, fragment_id):
+        self.id = proto.id
+        self.type = element_type
+        self.label = proto.label
+        self.form_id = proto.form_id
+        self.fragment_id = fragment_id
+        self.is_form_submitter = element_type == 'button' and proto.is_form_submitter
+        self.proto = proto
+
+
+class RunResult:
+    __slots__ = ('seconds', 'messages', 'bytes', 'status', 'fragment', 'markdown')
+
+    def __init__(self, seconds, messages, size, status, fragment, markdown):
+        self.seconds = seconds
+        self.messages = messages
+        self.bytes = size
+        self.status = status
+        self.fragment = fragment
+        # Bodies of the markdown elements the run drew, in order
+        self.markdown = markdown
+
+
+class SessionClient:
+    def __init__(self, url="ws://127.0.0.1:8501/_stcore/stream"):
+        self.url = url
+        self.widgets = {}
+        self.runs = []
+        self._ws = None
+        self._values = {}
+        self._pending = {}
+
+    async def connect(self):
+        self._ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+        return await self._rerun()
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+
+    def find(self, label):
+        for widget in self.widgets.values():
+            if widget.label == label or widget.label.strip('*') == label:
+                return widget
+        raise KeyError(f"No widget labelled {label!r}; have {sorted(w.label for w in self.widgets.values())}")
+
+    # Change a slider or checkbox; inside a form the value waits for the submit
+    async def set_value(self, label, value):
+        widget = self.find(label)
+        if widget.form_id:
+            self._pending[widget.id] = value
+            return None
+        self._values[widget.id] = value
+        return await self._rerun(fragment_id=widget.fragment_id)
+
+    async def click(self, label):
+        widget = self.find(label)
+        if widget.is_form_submitter:
+            self._values.update(self._pending)
+            self._pending.clear()
+        return await self._rerun(trigger=widget, fragment_id=widget.fragment_id)
+
+    def _widget_states(self, back_msg, trigger):
+        states = back_msg.rerun_script.widget_states.widgets
+        for widget_id, value in self._values.items():
+            widget = next((w for w in self.widgets.values() if w.id == widget_id), None)
+            if widget is None:
+                continue
+            state = states.add()
+            state.id = widget_id
+            if widget.type == 'checkbox':
+                state.bool_value = bool(value)
+            else:
+                state.double_array_value.data.extend(value if isinstance(value, (list, tuple)) else [value])
+        if trigger is not None:
+            state = states.add()
+            state.id = trigger.id
+            state.trigger_value = True
+
+    async def _rerun(self, trigger=None, fragment_id=""):
+        back_msg = BackMsg()
+        back_msg.rerun_script.query_string = ""
+        back_msg.rerun_script.page_script_hash = ""
+        if fragment_id:
+            back_msg.rerun_script.fragment_id = fragment_id
+        self._widget_states(back_msg, trigger)
+        start = time.perf_counter()
+        await self._ws.send(back_msg.SerializeToString())
+        messages, size, seen, markdown = 0, 0, {}, []
+        while True:
+            raw = await self._ws.recv()
+            messages += 1
+            size += len(raw)
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            kind = msg.WhichOneof('type')
+            if kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                element = msg.delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type in WIDGET_TYPES:
+                    proto = getattr(element, element_type)
+                    seen[proto.id] = Widget(element_type, proto, msg.delta.fragment_id)
+                elif element_type == 'markdown':
+                    markdown.append(element.markdown.body)
+            elif kind == 'script_finished':
+                status = ForwardMsg.ScriptFinishedStatus.Name(msg.script_finished)
+                if status == 'FINISHED_EARLY_FOR_RERUN':
+                    continue
+                break
+        if fragment_id:
+            # A fragment rerun only resends its own widgets
+            self.widgets = {k: w for k, w in self.widgets.items() if w.fragment_id != fragment_id}
+            self.widgets.update(seen)
+        else:
+            self.widgets = seen
+        result = RunResult(time.perf_counter() - start, messages, size, status, bool(fragment_id), markdown)
+        self.runs.append(result)
+        return result
+
+
+# Start `streamlit run` headless for the given script and wait until it serves
+class StreamlitServer:
+    def __init__(self, script="app.py", port=8599, env=None):
+        self.script = script
+        self.port = port
+        self.env = dict(os.environ, **(env or {}))
+        self.process = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", self.script,
+             "--server.headless", "true", "--server.port", str(self.port),
+             "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"],
+            cwd=REPO_DIR, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1)
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError(f"Streamlit did not start on port {self.port}")
+
+    def __exit__(self, *exc):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+
+    # CPU seconds (user + system) the server process has used so far
+    def cpu_seconds(self):
+        with open(f"/proc/{self.process.pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+    def rss_bytes(self):
+        with open(f"/proc/{self.process.pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
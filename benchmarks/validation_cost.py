@@ -0,0 +1,101 @@
+# Validation throughput: vectorised Validator vs. per-row Python checks
+#
+#   python benchmarks/validation_cost.py [--rows 500000] [--dirty 0.05]
+#
+# Resamples dataset.csv to --rows raw specs. In the dirty variant a --dirty
+# share of rows get RAM in GB as text ("4 GB"), clock speed in MHz, "yes"/"no"
+# flags or out-of-range battery values. The per-row baseline applies the same
+# rules one value at a time, as an ad-hoc loop over df.itertuples() would.
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import BOOLEAN_SPECS, RAW_FEATURES, read_dataset  # noqa: E402
+from validation import (BATCH_LIMITS, BOOLEAN_WORDS, RAM_GB_MAX, UNIT_SUFFIXES,  # noqa: E402
+                        Validator)
+
+NUMBER_WITH_UNIT = re.compile(r'^([-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)\s*([a-z]*)$')
+
+
+def make_catalog(rows, dirty, seed):
+    rng = np.random.default_rng(seed)
+    dataset = read_dataset()[RAW_FEATURES]
+    df = dataset.iloc[rng.integers(0, len(dataset), rows)].reset_index(drop=True)
+    if not dirty:
+        return df
+    for column in ('ram', 'clock_speed', 'blue'):
+        df[column] = df[column].astype(object)
+    picked = rng.choice(rows, int(rows * dirty), replace=False)
+    ram, mhz, flags, battery = np.array_split(picked, 4)
+    df.loc[ram, 'ram'] = [f"{max(1, v // 1024)} GB" for v in df.loc[ram, 'ram']]
+    df.loc[mhz, 'clock_speed'] = [f"{v * 1000:.0f} MHz" for v in df.loc[mhz, 'clock_speed']]
+    df.loc[flags, 'blue'] = np.where(df.loc[flags, 'blue'].astype(int) == 1, "yes", "no")
+    df.loc[battery, 'battery_power'] = 12000
+    return df
+
+
+def per_row_value(feature, value):
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if feature in BOOLEAN_SPECS and text in BOOLEAN_WORDS:
+            return BOOLEAN_WORDS[text]
+        match = NUMBER_WITH_UNIT.match(text)
+        if not match:
+            return None
+        number, unit = float(match.group(1)), match.group(2)
+        multiplier = {'': 1, **UNIT_SUFFIXES.get(feature, {})}.get(unit)
+        return None if multiplier is None else number * multiplier
+    value = float(value)
+    if feature == 'ram' and 0 < value <= RAM_GB_MAX:
+        value *= 1024
+    return value
+
+
+def validate_per_row(df):
+    kept = []
+    for row in df[RAW_FEATURES].itertuples(index=False):
+        clean = {}
+        for feature, value in zip(RAW_FEATURES, row):
+            value = per_row_value(feature, value)
+            if value is None or value != value:
+                break
+            low, high = BATCH_LIMITS[feature]
+            clean[feature] = min(max(value, low), high)
+        else:
+            kept.append(clean)
+    return kept
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare vectorised and per-row catalog validation")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--dirty", type=float, default=0.05, help="share of rows with a dirty value")
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'catalog':<10}{'vectorised rows/s':>19}{'per-row rows/s':>16}{'speed-up':>10}")
+    for name, dirty in (('clean', 0.0), ('dirty', args.dirty)):
+        df = make_catalog(args.rows, dirty, args.seed)
+        validator = Validator()
+        start = time.perf_counter()
+        for offset in range(0, len(df), args.chunksize):
+            validator.validate_frame(df.iloc[offset:offset + args.chunksize])
+        vectorised = time.perf_counter() - start
+        start = time.perf_counter()
+        kept = validate_per_row(df)
+        per_row = time.perf_counter() - start
+        # Both sides must apply the same rules for the comparison to hold
+        assert len(kept) == validator.rows - validator.rejected, (len(kept), validator.rows - validator.rejected)
+        print(f"{name:<10}{args.rows / vectorised:>19,.0f}{args.rows / per_row:>16,.0f}{per_row / vectorised:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
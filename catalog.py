@@ -0,0 +1,157 @@
+# Catalog scoring with content-hash incremental rescoring
+#
+# Every catalog row is keyed by a 64-bit hash of its FEATURE_LIST values,
+# salted with the model version, so a re-uploaded catalog only sends rows
+# whose specs changed (or that a new model has never seen) to the model.
+# Scores live in a process-wide `ScoreStore` shared by all sessions: sorted
+# key and probability arrays searched with np.searchsorted, about 32 bytes per
+# cached row. The store holds at most `max_rows` rows, evicting the least
+# recently used, and drops every row when the model version changes.
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from scoring import FEATURE_LIST, PRICE_RANGES, engineer_features, predict
+
+PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_MAX_ROWS = 2_000_000
+
+CATALOG_ROWS = metrics.REGISTRY.counter(
+    "mobicost_catalog_rows_total", "Catalog rows by whether they were rescored or reused from the cache", ["result"]
+)
+
+
+# uint64 key per row; values are cast to float first so 2549 and 2549.0 match.
+# pandas ignores hash_key for numeric columns, so the model version is mixed
+# in separately.
+def row_keys(df, version):
+    values = df[FEATURE_LIST].astype(np.float64)
+    salt = np.uint64(int.from_bytes(hashlib.sha256(str(version).encode()).digest()[:8], 'big'))
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64) ^ salt
+
+
+class ScoreStore:
+    def __init__(self, max_rows=DEFAULT_MAX_ROWS, n_classes=len(PRICE_RANGES)):
+        self.max_rows = max_rows
+        self.version = None
+        self._lock = threading.Lock()
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._proba = np.empty((0, n_classes), dtype=np.float32)
+        # Sequence number of the last lookup or add that touched each row
+        self._used = np.empty(0, dtype=np.uint64)
+        self._tick = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def nbytes(self):
+        return self._keys.nbytes + self._proba.nbytes + self._used.nbytes
+
+    # Keys are salted with the model version, so rows of another version can
+    # never match again. Called with the lock held.
+    def _use_version(self, version):
+        if version != self.version:
+            self.version = version
+            # Copies, so the old buffers are freed
+            self._keys, self._proba, self._used = self._keys[:0].copy(), self._proba[:0].copy(), self._used[:0].copy()
+        self._tick += 1
+        return self._tick
+
+    # Returns (found mask, probabilities for the found keys in input order)
+    def lookup(self, keys, version):
+        with self._lock:
+            tick = self._use_version(version)
+            stored_keys, stored_proba, used = self._keys, self._proba, self._used
+        if not len(stored_keys):
+            return np.zeros(len(keys), dtype=bool), stored_proba[:0]
+        positions = np.searchsorted(stored_keys, keys)
+        positions = np.minimum(positions, len(stored_keys) - 1)
+        found = stored_keys[positions] == keys
+        with self._lock:
+            # If add() swapped the arrays meanwhile, this refresh is lost
+            used[positions[found]] = tick
+        return found, stored_proba[positions[found]]
+
+    def add(self, keys, proba, version):
+        keys, first = np.unique(keys, return_index=True)
+        proba = np.asarray(proba, dtype=np.float32)[first]
+        with self._lock:
+            tick = self._use_version(version)
+            fresh = ~np.isin(keys, self._keys, assume_unique=True)
+            # Insert the new rows at their sorted positions instead of
+            # re-sorting the whole store
+            positions = np.searchsorted(self._keys, keys[fresh])
+            merged_keys = np.insert(self._keys, positions, keys[fresh])
+            merged_proba = np.insert(self._proba, positions, proba[fresh], axis=0)
+            merged_used = np.insert(self._used, positions, np.uint64(tick))
+            if len(merged_keys) > self.max_rows:
+                # Keep the most recently used rows, still in key order
+                keep = np.sort(np.argpartition(merged_used, -self.max_rows)[-self.max_rows:])
+                merged_keys, merged_proba, merged_used = merged_keys[keep], merged_proba[keep], merged_used[keep]
+            # Swap in new arrays; readers holding the old ones stay consistent
+            self._keys, self._proba, self._used = merged_keys, merged_proba, merged_used
+
+    def register_metrics(self, registry=metrics.REGISTRY):
+        registry.callback_gauge(
+            "mobicost_score_store_rows", "Catalog rows cached in the score store",
+            callback=lambda: {(): len(self)},
+        )
+        registry.callback_gauge(
+            "mobicost_score_store_bytes", "Bytes held by the score store",
+            callback=lambda: {(): self.nbytes},
+        )
+        return self
+
+
+# Score a catalog DataFrame of raw specs, rescoring only rows missing from
+# `store`. Returns the scored frame and the number of rows sent to the model.
+def score_catalog(df, model, scaler, store, version):
+    specs = engineer_features(df.copy())
+    keys = row_keys(specs, version)
+    found, cached = store.lookup(keys, version)
+    proba = np.empty((len(specs), len(PRICE_RANGES)), dtype=np.float32)
+    proba[found] = cached
+    missing = ~found
+    if missing.any():
+        # Duplicate specs within the upload are scored once
+        unique_keys, first, inverse = np.unique(keys[missing], return_index=True, return_inverse=True)
+        _, fresh = predict(model, scaler, specs.loc[missing].iloc[first])
+        store.add(unique_keys, fresh, version)
+        proba[missing] = fresh[inverse.reshape(-1)]
+    CATALOG_ROWS.inc(int(missing.sum()), result="rescored")
+    CATALOG_ROWS.inc(int(found.sum()), result="reused")
+    scored = df.copy()
+    scored['price_range'] = proba.argmax(axis=1)
+    scored['price_label'] = pd.Categorical.from_codes(
+        scored['price_range'], categories=[PRICE_RANGES[i] for i in sorted(PRICE_RANGES)]
+    )
+    scored['confidence'] = proba.max(axis=1)
+    return scored, int(missing.sum())
+
+
+# Filter and sort on the server; only the requested page leaves this function
+def page(scored, tiers=None, min_confidence=0.0, sort_by='confidence', descending=True, page_number=1, page_size=50):
+    mask = scored['confidence'].to_numpy() >= min_confidence
+    if tiers:
+        mask &= scored['price_label'].isin(tiers).to_numpy()
+    matching = np.flatnonzero(mask)
+    values = scored[sort_by].to_numpy()[matching]
+    order = np.argsort(values, kind='stable')
+    if descending:
+        order = order[::-1]
+    pages = max(1, -(-len(matching) // page_size))
+    page_number = min(max(page_number, 1), pages)
+    rows = matching[order[(page_number - 1) * page_size:page_number * page_size]]
+    return scored.iloc[rows], len(matching), pages
+
+
+# Count and mean confidence per predicted tier
+def tier_summary(scored):
+    summary = scored.groupby('price_label', observed=False)['confidence'].agg(['count', 'mean'])
+    summary.columns = ['Phones', 'Mean confidence']
+    summary.index.name = 'Tier'
+    return summary.reset_index()
@@ -0,0 +1,126 @@
+# Plotly figures for the results panel
+#
+# Building a figure validates every nested layout dict, which costs more than
+# the model prediction itself. Figures are therefore built once per process:
+# the confidence gauge is borrowed from a pool of templates and only its value
+# and colour are patched per prediction, and the feature-impact chart, which
+# only varies by tier colour, is cached outright and never mutated.
+import math
+import queue
+from contextlib import contextmanager
+from functools import lru_cache
+
+import plotly.graph_objects as go
+
+
+def build_confidence_gauge(confidence=0, color="#4da6ff"):
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = confidence,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Prediction Confidence", 'font': {'size': 24}},
+        gauge = {
+            'axis': {'range': [0, 100], 'tickfont': {'size': 16}},
+            'bar': {'color': color},
+            'steps': [
+                {'range': [0, 50], 'color': "rgba(30, 45, 65, 0.8)"},
+                {'range': [50, 100], 'color': "rgba(30, 45, 65, 0.6)"}
+            ],
+            'threshold': {
+                'line': {'color': "white", 'width': 4},
+                'thickness': 0.75,
+                'value': confidence
+            }
+        }
+    ))
+
+    fig.update_layout(
+        height=350,
+        margin=dict(l=0, r=0, t=80, b=0),
+        font=dict(color="white", size=18),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+
+def build_feature_impact(importance, color):
+    # Radial axis in steps of 0.1, just past the largest impact
+    top = max(0.1, math.ceil(max(impact for _, impact in importance) * 10) / 10)
+    tickvals = [round(i * 0.1, 1) for i in range(int(round(top * 10)) + 1)]
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatterpolar(
+        r=[impact for _, impact in importance],
+        theta=[feature for feature, _ in importance],
+        fill='toself',
+        name='Feature Impact',
+        line=dict(color=color, width=3),
+        hoverinfo='r+theta',
+        marker=dict(size=10)
+    ))
+
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, top],
+                tickfont=dict(color='white', size=16),
+                gridcolor='rgba(255, 255, 255, 0.15)',
+                tickvals=tickvals
+            ),
+            angularaxis=dict(
+                tickfont=dict(color='white', size=16),
+                gridcolor='rgba(255, 255, 255, 0.15)'
+            ),
+            bgcolor='rgba(0,0,0,0)'
+        ),
+        showlegend=False,
+        height=450,
+        margin=dict(l=60, r=60, t=60, b=60),
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white', size=14)
+    )
+    return fig
+
+
+# Reusable figures for concurrent sessions: each borrower gets a figure nobody
+# else is patching, and the pool only grows to the peak concurrency
+class FigurePool:
+    def __init__(self, factory):
+        self._factory = factory
+        self._free = queue.SimpleQueue()
+
+    @contextmanager
+    def borrow(self):
+        try:
+            fig = self._free.get_nowait()
+        except queue.Empty:
+            fig = self._factory()
+        try:
+            yield fig
+        finally:
+            self._free.put(fig)
+
+
+_GAUGES = FigurePool(build_confidence_gauge)
+
+
+# Gauge patched for one prediction; only valid inside the `with` block, so
+# render it (st.plotly_chart serialises immediately) before leaving
+@contextmanager
+def confidence_gauge(confidence, color):
+    with _GAUGES.borrow() as fig:
+        indicator = fig.data[0]
+        indicator.value = confidence
+        indicator.gauge.bar.color = color
+        indicator.gauge.threshold.value = confidence
+        yield fig
+
+
+# Shared read-only radial chart per (importance, colour); `importance` is a
+# tuple of (bucket, impact) pairs
+@lru_cache(maxsize=32)
+def feature_impact(importance, color):
+    return build_feature_impact(importance, color)
@@ -0,0 +1,153 @@
+# Distil the XGBoost model into the "lite" multinomial logistic model
+#
+#   python distill.py [--synthetic 20000] [--output phone_price_lite.npz]
+#
+# The student is trained on the teacher's soft probabilities (cross-entropy
+# against soft targets, via class-weighted rows) over the notebook's training
+# split plus synthetic specs, then evaluated on the notebook's held-out split.
+# The accuracy/latency report is printed and saved next to the model.
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+
+from scoring import (BOOLEAN_SPECS, FEATURE_LIST, LITE_MODEL_PATH, NUMERICAL_FEATURES, LiteModel,
+                     engineer_features, load_model, prepare_features, read_dataset)
+
+JITTERED_FEATURES = ['battery_power', 'clock_speed', 'fc', 'int_memory', 'mobile_wt', 'n_cores',
+                     'pc', 'px_height', 'px_width', 'ram', 'sc_h', 'sc_w', 'talk_time']
+
+
+# Synthetic specs: half jittered copies of training rows (dense around the
+# data), half uniform draws over the training ranges (covers feature combinations
+# the dataset lacks)
+def synthetic_specs(train, n, rng):
+    half = n // 2
+    jittered = train.sample(half, replace=True, random_state=rng.integers(1 << 31)).reset_index(drop=True)
+    for feature in JITTERED_FEATURES:
+        spread = train[feature].std() * 0.1
+        jittered[feature] = (jittered[feature] + rng.normal(0, spread, half)).clip(train[feature].min(), train[feature].max())
+    uniform = pd.DataFrame({
+        feature: rng.uniform(train[feature].min(), train[feature].max(), n - half) for feature in JITTERED_FEATURES
+    })
+    for feature in BOOLEAN_SPECS:
+        uniform[feature] = rng.integers(0, 2, n - half)
+    specs = pd.concat([jittered, uniform], ignore_index=True)
+    for feature in ['fc', 'int_memory', 'mobile_wt', 'n_cores', 'pc', 'px_height', 'px_width', 'ram', 'sc_h', 'sc_w', 'talk_time']:
+        specs[feature] = specs[feature].round()
+    return engineer_features(specs)
+
+
+def fit_student(X, soft_targets, C=10.0):
+    n, k = soft_targets.shape
+    # Cross-entropy against soft targets equals weighted cross-entropy over k copies of each row
+    mean, scale = X.mean(axis=0), X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Xs = (X - mean) / scale
+    X_rep = np.repeat(Xs, k, axis=0)
+    y_rep = np.tile(np.arange(k), n)
+    weights = soft_targets.reshape(-1)
+    clf = LogisticRegression(C=C, max_iter=2000)
+    clf.fit(X_rep, y_rep, sample_weight=weights)
+    # Fold the standardisation into the weights so the student takes raw features
+    coef = clf.coef_ / scale
+    intercept = clf.intercept_ - (clf.coef_ * mean / scale).sum(axis=1)
+    return LiteModel(coef, intercept)
+
+
+def _per_row_seconds(fn, records, repeat=200):
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(records[i % len(records)])
+    return (time.perf_counter() - start) / repeat
+
+
+def _batch_seconds(fn, rows, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def evaluate(model, scaler, student, test):
+    teacher_proba = model.predict_proba(prepare_features(test, scaler))
+    student_proba = student.predict_proba(test)
+    teacher_pred, student_pred = teacher_proba.argmax(axis=1), student_proba.argmax(axis=1)
+    y = test['price_range'].to_numpy()
+
+    # Latency as the app sees it: one spec dict per request, including feature preparation
+    def score_teacher_row(features):
+        input_df = pd.DataFrame([features])[FEATURE_LIST]
+        input_df[NUMERICAL_FEATURES] = scaler.transform(input_df[NUMERICAL_FEATURES])
+        return model.predict_proba(input_df)
+
+    def score_lite_row(features):
+        return student.predict_proba(np.array([features[f] for f in FEATURE_LIST], dtype=np.float64))
+
+    def score_teacher_batch(rows):
+        return model.predict_proba(prepare_features(rows, scaler))
+
+    def score_lite_batch(rows):
+        return student.predict_proba(rows[FEATURE_LIST].to_numpy(dtype=np.float64))
+
+    records = test[FEATURE_LIST].to_dict('records')
+    large = pd.concat([test] * max(1, 20000 // len(test)), ignore_index=True)
+    teacher_row, lite_row = _per_row_seconds(score_teacher_row, records), _per_row_seconds(score_lite_row, records)
+    teacher_batch, lite_batch = _batch_seconds(score_teacher_batch, large), _batch_seconds(score_lite_batch, large)
+    return {
+        'rows': len(test),
+        'teacher_accuracy': float((teacher_pred == y).mean()),
+        'student_accuracy': float((student_pred == y).mean()),
+        'agreement': float((teacher_pred == student_pred).mean()),
+        'mean_abs_probability_diff': float(np.abs(teacher_proba - student_proba).mean()),
+        'teacher_row_latency_ms': teacher_row * 1000,
+        'student_row_latency_ms': lite_row * 1000,
+        'row_speedup': teacher_row / lite_row,
+        'teacher_batch_rows_per_s': len(large) / teacher_batch,
+        'student_batch_rows_per_s': len(large) / lite_batch,
+        'batch_speedup': teacher_batch / lite_batch,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distil the XGBoost model into the lite model")
+    parser.add_argument("--synthetic", type=int, default=20000, help="number of synthetic specs to add")
+    parser.add_argument("--output", default=LITE_MODEL_PATH)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    model, scaler = load_model()
+    data = read_dataset()
+    # Same split as model.ipynb, so the held-out rows were never seen by the teacher
+    train, test = train_test_split(data, test_size=0.3, random_state=42)
+
+    rng = np.random.default_rng(args.seed)
+    specs = pd.concat([train, synthetic_specs(train, args.synthetic, rng)], ignore_index=True)
+    soft_targets = model.predict_proba(prepare_features(specs, scaler))
+    student = fit_student(specs[FEATURE_LIST].to_numpy(dtype=np.float64), soft_targets)
+    student.save(args.output)
+
+    report = evaluate(model, scaler, student, test)
+    report_path = args.output.rsplit('.', 1)[0] + '_report.json'
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Saved {args.output} (trained on {len(specs)} specs)")
+    print(f"Held-out rows:          {report['rows']}")
+    print(f"Accuracy  full / lite:  {report['teacher_accuracy']:.4f} / {report['student_accuracy']:.4f}")
+    print(f"Agreement with full:    {report['agreement']:.4f}")
+    print(f"Mean |Δp|:              {report['mean_abs_probability_diff']:.4f}")
+    print(f"Per-request latency:    {report['teacher_row_latency_ms']:.3f} ms -> {report['student_row_latency_ms']:.3f} ms "
+          f"({report['row_speedup']:.0f}x)")
+    print(f"Batch throughput:       {report['teacher_batch_rows_per_s']:,.0f} -> {report['student_batch_rows_per_s']:,.0f} rows/s "
+          f"({report['batch_speedup']:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
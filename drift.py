@@ -0,0 +1,180 @@
+# Streaming input-drift monitor against the training distribution
+#
+# The reference profile holds per-feature min/max, mean/std and a fixed-bin
+# histogram of dataset.csv. `DriftMonitor` keeps the same statistics for
+# incoming specs in constant memory: a Welford mean/variance and one bin
+# counter per feature, so each request costs O(1) per feature.
+import math
+import threading
+
+import numpy as np
+
+import metrics
+from scoring import FEATURE_LIST, read_dataset
+
+DEFAULT_BINS = 10
+
+# PSI above these values is conventionally read as a moderate / major shift
+PSI_WARNING = 0.1
+PSI_ALERT = 0.25
+
+# Floor for empty bins so PSI stays finite
+_EPSILON = 1e-4
+
+
+# Per-feature statistics of the training data, with `bins` equal-width bins
+# between the training min and max plus one underflow and one overflow bin
+def build_reference(df=None, features=FEATURE_LIST, bins=DEFAULT_BINS):
+    if df is None:
+        df = read_dataset()
+    reference = {}
+    for feature in features:
+        values = df[feature].to_numpy(dtype=float)
+        low, high = float(values.min()), float(values.max())
+        counts = np.bincount(_bin_indices(values, low, high, bins), minlength=bins + 2)
+        reference[feature] = {
+            'min': low,
+            'max': high,
+            'mean': float(values.mean()),
+            'std': float(values.std()),
+            'bins': bins,
+            'proportions': (counts / counts.sum()).tolist(),
+        }
+    return reference
+
+
+def _bin_indices(values, low, high, bins):
+    width = (high - low) / bins if high > low else 1.0
+    indices = np.floor((values - low) / width).astype(int) + 1
+    # The training max belongs to the last in-range bin, not the overflow bin
+    indices[values == high] = bins
+    return np.clip(indices, 0, bins + 1)
+
+
+def _bin_index(value, low, high, bins):
+    if value < low:
+        return 0
+    if value > high:
+        return bins + 1
+    if value == high or high == low:
+        return bins
+    return int((value - low) / ((high - low) / bins)) + 1
+
+
+def population_stability_index(expected, actual):
+    psi = 0.0
+    for e, a in zip(expected, actual):
+        e, a = max(e, _EPSILON), max(a, _EPSILON)
+        psi += (a - e) * math.log(a / e)
+    return psi
+
+
+class _FeatureStats:
+    __slots__ = ('count', 'mean', 'm2', 'counts', 'out_of_range')
+
+    def __init__(self, bins):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.counts = [0] * (bins + 2)
+        self.out_of_range = 0
+
+
+class DriftMonitor:
+    def __init__(self, reference):
+        self.reference = reference
+        self._lock = threading.Lock()
+        self._stats = {feature: _FeatureStats(ref['bins']) for feature, ref in reference.items()}
+
+    # Features of a single spec that fall outside the training range
+    def out_of_range(self, features):
+        flagged = {}
+        for feature, ref in self.reference.items():
+            value = features.get(feature)
+            if value is not None and not ref['min'] <= value <= ref['max']:
+                flagged[feature] = value
+        return flagged
+
+    # Record one spec; returns its out-of-range features
+    def update(self, features):
+        flagged = self.out_of_range(features)
+        with self._lock:
+            for feature, ref in self.reference.items():
+                value = features.get(feature)
+                if value is None:
+                    continue
+                value = float(value)
+                stats = self._stats[feature]
+                stats.count += 1
+                delta = value - stats.mean
+                stats.mean += delta / stats.count
+                stats.m2 += delta * (value - stats.mean)
+                stats.counts[_bin_index(value, ref['min'], ref['max'], ref['bins'])] += 1
+                if feature in flagged:
+                    stats.out_of_range += 1
+        return flagged
+
+    # Record a DataFrame chunk; statistics are merged with Chan's parallel update
+    # and the per-row out-of-range mask is returned
+    def update_batch(self, df):
+        mask = np.zeros(len(df), dtype=bool)
+        if not len(df):
+            return mask
+        merged = {}
+        for feature, ref in self.reference.items():
+            if feature not in df:
+                continue
+            column = df[feature].to_numpy(dtype=float)
+            outside = (column < ref['min']) | (column > ref['max'])
+            mask |= outside
+            values = column[~np.isnan(column)]
+            if not len(values):
+                continue
+            mean = float(values.mean())
+            counts = np.bincount(_bin_indices(values, ref['min'], ref['max'], ref['bins']), minlength=ref['bins'] + 2)
+            merged[feature] = (len(values), mean, float(((values - mean) ** 2).sum()), counts, int(outside.sum()))
+        with self._lock:
+            for feature, (n, mean, m2, counts, outside) in merged.items():
+                stats = self._stats[feature]
+                total = stats.count + n
+                delta = mean - stats.mean
+                stats.m2 += m2 + delta * delta * stats.count * n / total
+                stats.mean += delta * n / total
+                stats.count = total
+                stats.counts = [a + int(b) for a, b in zip(stats.counts, counts)]
+                stats.out_of_range += outside
+        return mask
+
+    # Drift scores per feature: PSI of the binned distribution, mean shift in
+    # training standard deviations and the share of out-of-range inputs
+    def scores(self):
+        with self._lock:
+            snapshot = {
+                feature: (stats.count, stats.mean, stats.m2, list(stats.counts), stats.out_of_range)
+                for feature, stats in self._stats.items()
+            }
+        scores = {}
+        for feature, (count, mean, m2, counts, outside) in snapshot.items():
+            if not count:
+                continue
+            ref = self.reference[feature]
+            scores[feature] = {
+                'count': count,
+                'mean': mean,
+                'std': math.sqrt(m2 / count),
+                'mean_shift': (mean - ref['mean']) / ref['std'] if ref['std'] else 0.0,
+                'psi': population_stability_index(ref['proportions'], [c / count for c in counts]),
+                'out_of_range_rate': outside / count,
+            }
+        return scores
+
+    def register_metrics(self, registry=metrics.REGISTRY):
+        registry.callback_gauge(
+            "mobicost_input_drift_psi", "Population stability index of incoming specs vs. training data", ["feature"],
+            callback=lambda: {(f,): s['psi'] for f, s in self.scores().items()},
+        )
+        registry.callback_gauge(
+            "mobicost_input_out_of_range_ratio", "Share of incoming specs outside the training range", ["feature"],
+            callback=lambda: {(f,): s['out_of_range_rate'] for f, s in self.scores().items()},
+        )
+        return self
@@ -0,0 +1,127 @@
+# Permutation importance of the shipped model, grouped into the UI buckets
+#
+#   python feature_importance.py [--repeats 30] [--workers 4]
+#
+# Each model feature and each UI bucket (all of its features shuffled
+# together) is a separate task run in a worker process. A task stacks all of
+# its shuffled repeats into one matrix and scores it with a single
+# predict_proba call. Importance is the mean drop in held-out accuracy. The
+# result is written to feature_importance.json, which app.py loads at startup.
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from scoring import FEATURE_LIST, load_model, model_version, prepare_features, read_dataset
+
+IMPORTANCE_PATH = 'feature_importance.json'
+
+# Model features behind each bucket of the feature impact chart
+IMPORTANCE_BUCKETS = {
+    'RAM': ['ram'],
+    'Battery': ['battery_power', 'talk_time'],
+    'Screen Quality': ['pixel_density', 'screen_area', 'sc_h', 'sc_w'],
+    'Internal Memory': ['int_memory'],
+    'Camera System': ['pc', 'fc', 'camera_total'],
+    'Processor': ['clock_speed', 'n_cores'],
+}
+
+_worker = {}
+
+
+def _init_worker(X, y, seed):
+    model, _ = load_model()
+    # One thread per process; the parallelism comes from the process pool
+    model.set_params(n_jobs=1)
+    _worker.update(model=model, X=X, y=y, seed=seed)
+
+
+def _permutation_task(name, columns, repeats):
+    model, X, y = _worker['model'], _worker['X'], _worker['y']
+    n = len(X)
+    # Seed per task, so results don't depend on how tasks land on workers
+    rng = np.random.default_rng([_worker['seed'], *map(ord, name)])
+    stacked = np.tile(X, (repeats, 1))
+    indices = [FEATURE_LIST.index(c) for c in columns]
+    for r in range(repeats):
+        # Columns of a group share one permutation so engineered features stay consistent
+        order = rng.permutation(n)
+        stacked[r * n:(r + 1) * n, indices] = X[order][:, indices]
+    predictions = model.predict_proba(stacked).argmax(axis=1).reshape(repeats, n)
+    scores = (predictions == y).mean(axis=1)
+    return name, scores
+
+
+def compute_importance(repeats=30, workers=None, seed=42):
+    model, scaler = load_model()
+    data = read_dataset()
+    # Held-out split from model.ipynb
+    _, test = train_test_split(data, test_size=0.3, random_state=42)
+    X = prepare_features(test, scaler)[FEATURE_LIST].to_numpy(dtype=np.float32)
+    y = test['price_range'].to_numpy()
+    baseline = float((model.predict_proba(X).argmax(axis=1) == y).mean())
+
+    tasks = [(feature, [feature]) for feature in FEATURE_LIST] + list(IMPORTANCE_BUCKETS.items())
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y, seed)) as pool:
+        futures = [pool.submit(_permutation_task, name, columns, repeats) for name, columns in tasks]
+        results = dict(future.result() for future in futures)
+
+    def summarise(name):
+        drops = baseline - results[name]
+        return {'mean': float(drops.mean()), 'std': float(drops.std())}
+
+    buckets = {name: summarise(name) for name in IMPORTANCE_BUCKETS}
+    features = {feature: summarise(feature) for feature in FEATURE_LIST}
+    return {
+        'model_version': model_version(),
+        'metric': 'accuracy_drop',
+        'baseline_accuracy': baseline,
+        'held_out_rows': len(y),
+        'repeats': repeats,
+        'buckets': dict(sorted(buckets.items(), key=lambda item: -item[1]['mean'])),
+        'features': dict(sorted(features.items(), key=lambda item: -item[1]['mean'])),
+    }
+
+
+# Bucket -> importance, or None when the artifact is missing or was computed
+# for a model other than `version` (e.g. after a retrain without rerunning this
+# job). Drops within shuffling noise can be slightly negative and are reported
+# as zero.
+def load_importance(path=IMPORTANCE_PATH, version=None):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        artifact = json.load(f)
+    if version is not None and artifact.get('model_version') != version:
+        print(f"Ignoring {path}: computed for model {artifact.get('model_version')}, "
+              f"but the loaded model is {version}. Rerun feature_importance.py.")
+        return None
+    return {bucket: max(stats['mean'], 0.0) for bucket, stats in artifact['buckets'].items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute permutation importance of the shipped model")
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=IMPORTANCE_PATH)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    artifact = compute_importance(args.repeats, args.workers, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(artifact, f, indent=2)
+
+    print(f"Baseline held-out accuracy {artifact['baseline_accuracy']:.4f} "
+          f"({artifact['repeats']} repeats, {time.perf_counter() - start:.1f}s)")
+    for bucket, stats in artifact['buckets'].items():
+        print(f"{bucket:<16}{stats['mean']:>8.4f} ± {stats['std']:.4f}")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# In-process metrics with Prometheus text exposition
+#
+# Counters, gauges and fixed-bucket histograms are kept per process and guarded
+# by one small lock per metric, so recording a sample costs a dict lookup and an
+# addition. `start_http_server()` exposes everything registered in `REGISTRY` on
+# a local port in the Prometheus text format (version 0.0.4).
+import bisect
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from sub-millisecond model calls to slow image loads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {sorted(labelnames)}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+    def render(self):
+        return "\n".join(self._header() + self.samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+
+class CallbackGauge(_Metric):
+    kind = "gauge"
+
+    # `callback` returns {label value tuple: value} and runs only when scraped,
+    # for values that are too costly to keep current on every request
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self):
+        try:
+            values = self.callback() if self.callback else {}
+        except Exception as e:
+            # A failing callback drops only its own samples, not the whole scrape
+            print(f"Metric {self.name} callback failed: {e!r}")
+            return []
+        return [
+            f"{self.name}{_format_labels(self.labelnames, tuple(str(k) for k in key))} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class CallbackCounter(CallbackGauge):
+    kind = "counter"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        # Samples land in exactly one bucket; cumulative counts are built at scrape time
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(_label_key(self.labelnames, labels))
+            return sum(state[0]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1])) for key, state in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, cls, name, documentation, labelnames=(), **kwargs):
+        # Re-registering returns the existing metric, so Streamlit reruns and
+        # re-imports never create duplicates
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def callback_gauge(self, name, documentation, labelnames=(), callback=None):
+        metric = self._register(CallbackGauge, name, documentation, labelnames)
+        if callback is not None:
+            metric.callback = callback
+        return metric
+
+    def callback_counter(self, name, documentation, labelnames=(), callback=None):
+        metric = self._register(CallbackCounter, name, documentation, labelnames)
+        if callback is not None:
+            metric.callback = callback
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Metrics shared by the app and the batch/server entry points
+SCRIPT_RUNS = REGISTRY.counter("mobicost_script_runs_total", "Streamlit script runs (page loads and widget reruns)")
+FRAGMENT_RUNS = REGISTRY.counter("mobicost_fragment_runs_total", "Fragment executions, in full runs or on their own", ["fragment"])
+PREDICTIONS = REGISTRY.counter("mobicost_predictions_total", "Predictions served by price tier", ["tier"])
+PREDICTION_ERRORS = REGISTRY.counter("mobicost_prediction_errors_total", "Predictions that raised an error", ["stage"])
+PREDICTION_LATENCY = REGISTRY.histogram(
+    "mobicost_prediction_stage_seconds", "Prediction latency per stage", ["stage"]
+)
+MODEL_LOAD_SECONDS = REGISTRY.histogram("mobicost_model_load_seconds", "Time spent loading the model and scaler")
+IMAGE_LOADS = REGISTRY.counter("mobicost_image_loads_total", "Phone image asset loads by source", ["source"])
+IMAGE_LOAD_SECONDS = REGISTRY.histogram("mobicost_image_load_seconds", "Phone image asset load latency")
+
+
+# Standard process metrics, read at scrape time
+def _process_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {(): usage.ru_utime + usage.ru_stime}
+
+
+def _process_resident_memory_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return {(): int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")}
+    except OSError:
+        # Peak rather than current RSS where /proc is unavailable (kB on Linux, bytes on macOS)
+        return {(): resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+
+REGISTRY.callback_counter("process_cpu_seconds_total", "Total user and system CPU time in seconds", callback=_process_cpu_seconds)
+REGISTRY.callback_gauge("process_resident_memory_bytes", "Resident memory size in bytes", callback=_process_resident_memory_bytes)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would otherwise flood stderr
+        pass
+
+
+# Serve the registry on a background thread; returns the server so callers can shut it down
+def start_http_server(port, addr="127.0.0.1", registry=REGISTRY):
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((addr, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True)
+    thread.start()
+    return server
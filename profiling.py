@@ -0,0 +1,196 @@
+# Opt-in cProfile + tracemalloc sampling of the prediction path
+#
+#   MOBICOST_PROFILE_RATE=0.05 streamlit run app.py      # profile 5% of requests
+#   MOBICOST_PROFILE_TOKEN=secret streamlit run app.py   # ...or ?profile=secret
+#
+# `Profiler.profile(target)` wraps a block. For a sampled request it runs the
+# block under cProfile with tracemalloc tracing, then writes three files to the
+# profile directory: <stem>.prof (pstats), <stem>.heap (tracemalloc snapshot of
+# memory allocated during the block and still alive at its end) and
+# <stem>.json (target, duration, peak traced memory). Only the newest `keep`
+# samples are kept.
+#
+# One block is profiled at a time per process: concurrent sessions and nested
+# wrapped calls (load_image() inside the predict branch) run unprofiled rather
+# than fight over the interpreter-wide profiler and tracemalloc state.
+#
+# Summarise collected samples:
+#
+#   python profiling.py [--dir profiles] [--target predict] [--last 20] [--top 15]
+import argparse
+import cProfile
+import glob
+import hmac
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import metrics
+
+PROFILE_DIR = 'profiles'
+DEFAULT_KEEP = 200
+TRACEMALLOC_FRAMES = 10
+
+PROFILES = metrics.REGISTRY.counter(
+    "mobicost_profiles_total", "Requests profiled with cProfile and tracemalloc", ["target"]
+)
+
+# Allocations made by the profiler machinery itself, including this module
+_IGNORED_FILES = (
+    __file__, tracemalloc.__file__, cProfile.__file__, pstats.__file__, "<frozen importlib._bootstrap>"
+)
+
+
+class Profiler:
+    def __init__(self, directory=PROFILE_DIR, rate=0.0, token=None, keep=DEFAULT_KEEP):
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Profile rate must be between 0 and 1, got {rate}")
+        self.directory = directory
+        self.rate = rate
+        self.token = token
+        self.keep = keep
+        self._busy = threading.Lock()
+        self._seq = 0
+
+    # True when `value` (e.g. the ?profile= query parameter) matches the admin token
+    def authorised(self, value):
+        return bool(self.token) and bool(value) and hmac.compare_digest(str(value), self.token)
+
+    @contextmanager
+    def profile(self, target, force=False):
+        if not (force or (self.rate and random.random() < self.rate)):
+            yield
+            return
+        if not self._busy.acquire(blocking=False):
+            yield
+            return
+        try:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            tracemalloc.reset_peak()
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                seconds = time.perf_counter() - start
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+                self._write(target, profiler, snapshot, seconds, peak)
+                PROFILES.inc(target=target)
+        finally:
+            self._busy.release()
+
+    def _write(self, target, profiler, snapshot, seconds, peak):
+        os.makedirs(self.directory, exist_ok=True)
+        self._seq += 1
+        stem = os.path.join(
+            self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._seq:05d}-{target}"
+        )
+        profiler.dump_stats(stem + ".prof")
+        snapshot.filter_traces([tracemalloc.Filter(False, f) for f in _IGNORED_FILES]).dump(stem + ".heap")
+        with open(stem + ".json", "w") as f:
+            json.dump({'target': target, 'time': time.time(), 'seconds': seconds, 'peak_bytes': peak}, f)
+        self._rotate()
+
+    # Delete the oldest samples beyond `keep`
+    def _rotate(self):
+        samples = sorted(glob.glob(os.path.join(self.directory, "*.json")), key=os.path.getmtime)
+        for meta in samples[:max(0, len(samples) - self.keep)]:
+            stem = meta[:-len(".json")]
+            for suffix in (".json", ".prof", ".heap"):
+                try:
+                    os.remove(stem + suffix)
+                except FileNotFoundError:
+                    pass
+
+
+def from_environment():
+    return Profiler(
+        directory=os.environ.get("MOBICOST_PROFILE_DIR", PROFILE_DIR),
+        rate=float(os.environ.get("MOBICOST_PROFILE_RATE", "0")),
+        token=os.environ.get("MOBICOST_PROFILE_TOKEN") or None,
+        keep=int(os.environ.get("MOBICOST_PROFILE_KEEP", DEFAULT_KEEP)),
+    )
+
+
+# Sample metadata, newest last, optionally limited to one target
+def list_samples(directory=PROFILE_DIR, target=None, last=None):
+    samples = []
+    for meta in glob.glob(os.path.join(directory, "*.json")):
+        with open(meta) as f:
+            sample = json.load(f)
+        if target and sample['target'] != target:
+            continue
+        sample['stem'] = meta[:-len(".json")]
+        samples.append(sample)
+    samples.sort(key=lambda s: s['time'])
+    return samples[-last:] if last else samples
+
+
+def top_functions(samples, top=15):
+    stats = pstats.Stats(*[s['stem'] + ".prof" for s in samples])
+    rows = []
+    for (filename, line, name), (_, calls, _, cumulative, _) in stats.stats.items():
+        rows.append((cumulative / len(samples), calls / len(samples), f"{os.path.basename(filename)}:{line}({name})"))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def top_allocations(samples, top=15):
+    totals = {}
+    for sample in samples:
+        snapshot = tracemalloc.Snapshot.load(sample['stem'] + ".heap")
+        for stat in snapshot.statistics('lineno'):
+            frame = stat.traceback[0]
+            key = f"{frame.filename}:{frame.lineno}"
+            size, count = totals.get(key, (0, 0))
+            totals[key] = (size + stat.size, count + stat.count)
+    rows = [(size / len(samples), count / len(samples), key) for key, (size, count) in totals.items()]
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise sampled profiles")
+    parser.add_argument("--dir", default=os.environ.get("MOBICOST_PROFILE_DIR", PROFILE_DIR))
+    parser.add_argument("--target", help="only samples of this target (predict, load_image, load_model)")
+    parser.add_argument("--last", type=int, help="only the newest N samples")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    samples = list_samples(args.dir, args.target, args.last)
+    if not samples:
+        print(f"No profiles in {args.dir}")
+        return
+
+    print(f"{'target':<12}{'samples':>8}{'mean ms':>10}{'max ms':>10}{'peak KiB':>10}")
+    for target in sorted({s['target'] for s in samples}):
+        group = [s for s in samples if s['target'] == target]
+        seconds = [s['seconds'] for s in group]
+        print(f"{target:<12}{len(group):>8}{sum(seconds) / len(group) * 1000:>10.1f}"
+              f"{max(seconds) * 1000:>10.1f}{max(s['peak_bytes'] for s in group) / 1024:>10.0f}")
+
+    print(f"\nTop functions by cumulative time (mean per sample over {len(samples)} samples)")
+    print(f"{'cum ms':>9}{'calls':>9}  function")
+    for cumulative, calls, function in top_functions(samples, args.top):
+        print(f"{cumulative * 1000:>9.2f}{calls:>9.0f}  {function}")
+
+    print("\nTop allocation sites still alive at the end of the block (mean per sample)")
+    print(f"{'KiB':>9}{'blocks':>9}  line")
+    for size, count, line in top_allocations(samples, args.top):
+        print(f"{size / 1024:>9.1f}{count:>9.0f}  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# Feature preparation and model scoring shared by the app and batch jobs
+import hashlib
+
+import joblib
+import numpy as np
+import pandas as pd
+
+MODEL_PATH = 'phone_price_model.pkl'
+SCALER_PATH = 'scaler.pkl'
+LITE_MODEL_PATH = 'phone_price_lite.npz'
+DATASET_PATH = 'dataset.csv'
+
+# Price range mapping
+PRICE_RANGES = {
+    0: "Budget",
+    1: "Mid-Range",
+    2: "Premium",
+    3: "Luxury"
+}
+
+# Specs a phone is described by before feature engineering
+RAW_FEATURES = [
+    'battery_power', 'blue', 'clock_speed', 'dual_sim', 'fc', 'four_g',
+    'int_memory', 'mobile_wt', 'n_cores', 'pc', 'px_height', 'px_width',
+    'ram', 'sc_h', 'sc_w', 'talk_time', 'three_g', 'touch_screen', 'wifi'
+]
+
+# On/off specs, and the one fractional spec; every other raw spec is an integer
+BOOLEAN_SPECS = ['blue', 'dual_sim', 'four_g', 'three_g', 'touch_screen', 'wifi']
+FLOAT_SPECS = ['clock_speed']
+
+# Feature list used in the trained model
+FEATURE_LIST = [
+    'battery_power', 'blue', 'clock_speed', 'dual_sim', 'fc', 'four_g',
+    'int_memory', 'mobile_wt', 'n_cores', 'pc', 'ram', 'sc_h', 'sc_w',
+    'talk_time', 'three_g', 'touch_screen', 'wifi', 'pixel_density',
+    'screen_area', 'camera_total'
+]
+
+NUMERICAL_FEATURES = ['battery_power', 'ram', 'pixel_density', 'screen_area', 'int_memory', 'camera_total']
+
+
+def load_model(model_path=MODEL_PATH, scaler_path=SCALER_PATH):
+    return joblib.load(model_path), joblib.load(scaler_path)
+
+
+# Short content hash identifying a model/scaler pair, used to tag derived artifacts
+def model_version(model_path=MODEL_PATH, scaler_path=SCALER_PATH):
+    digest = hashlib.sha256()
+    for path in (model_path, scaler_path):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+# Same feature engineering as model.ipynb; works on a dict of scalars or a DataFrame
+def engineer_features(features):
+    features['pixel_density'] = features['px_width'] * features['px_height']
+    features['screen_area'] = features['sc_w'] * features['sc_h']
+    features['camera_total'] = features['pc'] + features['fc']
+    return features
+
+
+# Build the scaled model input for a DataFrame of raw specs
+def prepare_features(df, scaler):
+    input_df = engineer_features(df.copy())[FEATURE_LIST].astype(float)
+    input_df[NUMERICAL_FEATURES] = scaler.transform(input_df[NUMERICAL_FEATURES])
+    return input_df
+
+
+# Score a DataFrame of raw specs; returns predicted classes and class probabilities
+def predict(model, scaler, df):
+    input_df = prepare_features(df, scaler)
+    probabilities = model.predict_proba(input_df)
+    return np.argmax(probabilities, axis=1), probabilities
+
+
+# Engineered float64 matrix in FEATURE_LIST order from a mapping of raw spec
+# name -> 1-D array, filled column by column without building a DataFrame
+def feature_matrix(columns):
+    specs = engineer_features(dict(columns))
+    X = np.empty((len(specs[FEATURE_LIST[0]]), len(FEATURE_LIST)), dtype=np.float64)
+    for i, feature in enumerate(FEATURE_LIST):
+        X[:, i] = specs[feature]
+    return X
+
+
+_NUMERICAL_COLUMNS = [FEATURE_LIST.index(f) for f in NUMERICAL_FEATURES]
+
+
+# Score a feature_matrix(); same result as predict() on the equivalent DataFrame
+def predict_matrix(model, scaler, X):
+    scaled = X.copy()
+    scaled[:, _NUMERICAL_COLUMNS] = (scaled[:, _NUMERICAL_COLUMNS] - scaler.mean_) / scaler.scale_
+    probabilities = model.predict_proba(scaled)
+    return np.argmax(probabilities, axis=1), probabilities
+
+
+# Multinomial logistic student distilled from the XGBoost model (see distill.py).
+# Its standardisation is folded into the weights, so it scores engineered but
+# unscaled features with a single matrix product.
+class LiteModel:
+    def __init__(self, coef, intercept, features=FEATURE_LIST):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.features = list(features)
+
+    @classmethod
+    def load(cls, path=LITE_MODEL_PATH):
+        with np.load(path) as data:
+            return cls(data['coef'], data['intercept'], data['features'].tolist())
+
+    def save(self, path=LITE_MODEL_PATH):
+        np.savez(path, coef=self.coef, intercept=self.intercept, features=np.array(self.features))
+
+    def predict_proba(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features].to_numpy(dtype=np.float64)
+        logits = np.atleast_2d(X) @ self.coef.T + self.intercept
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.predict_proba(X).argmax(axis=1)
+
+
+# Score a DataFrame of raw specs with the lite model
+def predict_lite(lite_model, df):
+    probabilities = lite_model.predict_proba(engineer_features(df.copy()))
+    return np.argmax(probabilities, axis=1), probabilities
+
+
+def read_dataset(path=DATASET_PATH):
+    return engineer_features(pd.read_csv(path))
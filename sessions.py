@@ -0,0 +1,279 @@
+# Per-session state: compact spec record, shared payload cache, idle expiry
+# and memory accounting
+#
+# A session keeps its phone spec as one fixed-layout NumPy record (SPEC_DTYPE,
+# 62 bytes of data) under a single session_state key, instead of one key per
+# slider plus derived features. Heavy payloads such as scored catalogs live in
+# a process-wide, byte-bounded `SharedCache`. A session holds only the cache
+# key, so sessions that upload the same file share one copy, and an evicted
+# entry is rebuilt on demand.
+#
+# `SessionTracker` records when each session last ran. A sweeper thread drops
+# the catalog and widget state of sessions idle longer than the TTL. The spec
+# record is kept: a returning session rebuilds its widgets from it.
+# Per-session memory is exported as Prometheus gauges, measured once per
+# /metrics scrape.
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from scoring import BOOLEAN_SPECS, FLOAT_SPECS, RAW_FEATURES
+
+SPEC_KEY = 'spec'
+CATALOG_KEY = 'catalog'
+# Session-state keys owned by the app
+APP_KEYS = (SPEC_KEY, CATALOG_KEY)
+
+DEFAULT_IDLE_SECONDS = 1800
+# The session gauges of one scrape share a single walk over session state
+USAGE_TTL_SECONDS = 1.0
+DEFAULT_SHARED_CACHE_BYTES = 256 * 2 ** 20
+
+SPEC_DTYPE = np.dtype([
+    (f, np.bool_ if f in BOOLEAN_SPECS else np.float64 if f in FLOAT_SPECS else np.int32)
+    for f in RAW_FEATURES
+])
+
+# Slider starting values before a Quick Start or prediction
+SPEC_DEFAULTS = {
+    'battery_power': 3500, 'int_memory': 128, 'ram': 4000, 'px_height': 1440, 'px_width': 2560,
+    'sc_h': 15, 'sc_w': 8, 'pc': 48, 'fc': 16, 'clock_speed': 2.5, 'n_cores': 8, 'mobile_wt': 180,
+    'talk_time': 18, 'blue': True, 'four_g': True, 'dual_sim': True, 'three_g': True, 'wifi': True,
+    'touch_screen': True,
+}
+
+SESSIONS_EXPIRED = metrics.REGISTRY.counter(
+    "mobicost_sessions_expired_total", "Sessions whose state was dropped after going idle"
+)
+
+
+def new_spec(values=None):
+    spec = np.zeros((), dtype=SPEC_DTYPE)
+    update_spec(spec, SPEC_DEFAULTS)
+    if values:
+        update_spec(spec, values)
+    return spec
+
+
+# Copy raw spec fields from a dict; derived features and other keys are ignored
+def update_spec(spec, values):
+    for name in SPEC_DTYPE.names:
+        if name in values:
+            spec[name] = values[name]
+    return spec
+
+
+# Session-state key of the slider or checkbox for one spec field. A fixed key
+# keeps the widget's identity when its starting value changes.
+def widget_key(name):
+    return f"{SPEC_KEY}_{name}"
+
+
+SPEC_WIDGET_KEYS = frozenset(widget_key(name) for name in SPEC_DTYPE.names)
+
+
+# Generated widget IDs and the fixed keys of the spec widgets
+def is_widget_key(key):
+    from streamlit.runtime.state.common import is_element_id
+
+    return key in SPEC_WIDGET_KEYS or is_element_id(key)
+
+
+# Plain Python value of one spec field, as the widgets expect
+def spec_value(spec, name):
+    return spec[name].item()
+
+
+# Approximate bytes held by a session-state value
+def sizeof(value, _seen=None):
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sizeof(k, _seen) + sizeof(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sizeof(v, _seen) for v in value)
+    return size
+
+
+# Byte-bounded LRU shared by all sessions
+class SharedCache:
+    def __init__(self, max_bytes=DEFAULT_SHARED_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        size = sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            # Always keep the newest entry, even when it alone exceeds the budget
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+        return value
+
+
+def _list_sessions():
+    from streamlit.runtime import Runtime
+
+    if not Runtime.exists():
+        return []
+    # Streamlit has no public accessor; its own session-state stats provider
+    # reads the session manager the same way. If a Streamlit upgrade moves it,
+    # the session metrics and idle expiry go quiet instead of failing.
+    try:
+        return [info.session for info in Runtime.instance()._session_mgr.list_sessions()]
+    except AttributeError:
+        return []
+
+
+# Tracks session activity, expires idle state and reports per-session memory
+class SessionTracker:
+    def __init__(self, idle_seconds=DEFAULT_IDLE_SECONDS, list_sessions=_list_sessions):
+        self.idle_seconds = idle_seconds
+        self._list_sessions = list_sessions
+        self._lock = threading.Lock()
+        self._last_active = {}
+        self._thread = None
+        self._usage = (None, {})
+
+    def touch(self, session_id):
+        with self._lock:
+            self._last_active[session_id] = time.monotonic()
+
+    # Bytes per session-state key for every live session; generated widget
+    # keys are grouped under "widgets". Results are reused for
+    # USAGE_TTL_SECONDS, so the gauges of one scrape walk session state once.
+    def usage(self):
+        now = time.monotonic()
+        with self._lock:
+            measured_at, usage = self._usage
+            if measured_at is not None and now - measured_at < USAGE_TTL_SECONDS:
+                return usage
+        usage = self._measure()
+        with self._lock:
+            self._usage = (now, usage)
+        return usage
+
+    def _measure(self):
+        sessions = {}
+        for session in self._list_sessions():
+            state = session.session_state
+            usage = {}
+            try:
+                for key in list(state):
+                    try:
+                        size = sizeof(state[key])
+                    except Exception:
+                        continue
+                    group = 'widgets' if is_widget_key(key) else key if key in APP_KEYS else 'other'
+                    usage[group] = usage.get(group, 0) + size
+            except RuntimeError:
+                # The session changed its state mid-scan; measure it next scrape
+                continue
+            sessions[session.id] = usage
+        return sessions
+
+    # Drop the catalog and widget state of sessions idle longer than
+    # `idle_seconds`. The 62-byte spec record stays, so when the session reruns
+    # its widgets keep the values the browser sends, or start from the record.
+    def expire_idle(self):
+        now = time.monotonic()
+        live = set()
+        expired = 0
+        for session in self._list_sessions():
+            live.add(session.id)
+            with self._lock:
+                last_active = self._last_active.setdefault(session.id, now)
+            if now - last_active < self.idle_seconds:
+                continue
+            state = session.session_state
+            try:
+                keys = [key for key in list(state) if key == CATALOG_KEY or is_widget_key(key)]
+            except RuntimeError:
+                # The session changed its state mid-scan; retry next sweep
+                continue
+            for key in keys:
+                try:
+                    del state[key]
+                except KeyError:
+                    # Removed by the session itself since the listing
+                    pass
+            expired += bool(keys)
+        with self._lock:
+            for session_id in set(self._last_active) - live:
+                del self._last_active[session_id]
+        if expired:
+            SESSIONS_EXPIRED.inc(expired)
+        return expired
+
+    # Sweep every minute, or more often for short TTLs
+    def start(self, interval=None):
+        interval = interval or min(60, max(1, self.idle_seconds / 4))
+        if self.idle_seconds and self._thread is None:
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="session-sweeper", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.expire_idle()
+            except Exception as e:
+                print(f"Session sweep failed: {e!r}")
+
+    def register_metrics(self, shared_cache=None, registry=metrics.REGISTRY):
+        registry.callback_gauge(
+            "mobicost_sessions", "Live Streamlit sessions in this process",
+            callback=lambda: {(): len(self._list_sessions())},
+        )
+        registry.callback_gauge(
+            "mobicost_session_state_bytes", "Session-state bytes summed over sessions, by key", ["key"],
+            callback=self._bytes_by_key,
+        )
+        registry.callback_gauge(
+            "mobicost_session_state_max_bytes", "Session-state bytes of the largest session",
+            callback=lambda: {(): max((sum(u.values()) for u in self.usage().values()), default=0)},
+        )
+        if shared_cache is not None:
+            registry.callback_gauge(
+                "mobicost_shared_cache_bytes", "Bytes held in the cross-session payload cache",
+                callback=lambda: {(): shared_cache.nbytes},
+            )
+        return self
+
+    def _bytes_by_key(self):
+        totals = {}
+        for usage in self.usage().values():
+            for key, size in usage.items():
+                totals[(key,)] = totals.get((key,), 0) + size
+        return totals
@@ -0,0 +1,203 @@
+# Shadow and A/B scoring of a candidate model off the request path
+#
+# Every prediction hands its engineered (unscaled) feature vector and served
+# probabilities to `ShadowScorer.submit()`, which only enqueues. A background
+# worker drains the queue in batches, scores the model that did not serve the
+# request and records tier agreement and probability shifts between the
+# current and candidate models.
+#
+# With an A/B split, sessions whose hash falls below the split are served by
+# the candidate and shadowed by the current model, so both arms are compared
+# on the same terms.
+import hashlib
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from scoring import FEATURE_LIST, NUMERICAL_FEATURES, SCALER_PATH, load_model
+
+CURRENT = "current"
+CANDIDATE = "candidate"
+
+SHADOW_SCORED = metrics.REGISTRY.counter(
+    "mobicost_shadow_scored_total", "Requests scored by both models, by serving arm", ["arm"]
+)
+SHADOW_AGREEMENT = metrics.REGISTRY.counter(
+    "mobicost_shadow_agreement_total", "Requests where both models predicted the same tier", ["arm"]
+)
+SHADOW_DROPPED = metrics.REGISTRY.counter(
+    "mobicost_shadow_dropped_total", "Shadow requests dropped because the queue was full"
+)
+SHADOW_PROB_SHIFT = metrics.REGISTRY.histogram(
+    "mobicost_shadow_probability_shift", "Largest absolute per-class probability change, candidate vs. current",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0),
+)
+SHADOW_BATCH_SECONDS = metrics.REGISTRY.histogram(
+    "mobicost_shadow_batch_seconds", "Time to score one shadow batch"
+)
+
+
+# Stable assignment of a session to the candidate arm
+def assign_arm(session_id, split):
+    if split <= 0:
+        return CURRENT
+    digest = hashlib.sha256(str(session_id).encode()).digest()
+    bucket = int.from_bytes(digest[:8], 'big') / 2 ** 64
+    return CANDIDATE if bucket < split else CURRENT
+
+
+def _predict_proba(model, scaler, rows):
+    input_df = pd.DataFrame(rows, columns=FEATURE_LIST)
+    input_df[NUMERICAL_FEATURES] = scaler.transform(input_df[NUMERICAL_FEATURES])
+    return model.predict_proba(input_df)
+
+
+class ShadowScorer:
+    def __init__(self, current, candidate, split=0.0, batch_size=64, max_queue=10000, max_wait=0.25):
+        # `current` and `candidate` are (model, scaler) pairs
+        self.models = {CURRENT: current, CANDIDATE: candidate}
+        self.split = split
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        n_classes = 4
+        self._stats = {
+            arm: {
+                'count': 0,
+                'agree': 0,
+                'confusion': np.zeros((n_classes, n_classes), dtype=np.int64),
+                'shift_sum': np.zeros(n_classes),
+                'abs_shift_sum': 0.0,
+            }
+            for arm in (CURRENT, CANDIDATE)
+        }
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._worker.start()
+
+    def arm_for(self, session_id):
+        return assign_arm(session_id, self.split)
+
+    # Score on the request path with the model that serves this arm
+    def predict_proba(self, arm, rows):
+        model, scaler = self.models[arm]
+        return _predict_proba(model, scaler, rows)
+
+    # Enqueue one engineered feature vector (FEATURE_LIST order) with the
+    # probabilities already served for it; never blocks the caller
+    def submit(self, features, served_probabilities, arm=CURRENT):
+        row = np.asarray([features[f] for f in FEATURE_LIST] if isinstance(features, dict) else features, dtype=float)
+        try:
+            self._queue.put_nowait((arm, row, np.asarray(served_probabilities, dtype=float)))
+        except queue.Full:
+            SHADOW_DROPPED.inc()
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.max_wait)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            for arm in (CURRENT, CANDIDATE):
+                items = [item for item in batch if item[0] == arm]
+                if items:
+                    self._score(arm, items)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _score(self, arm, items):
+        # The shadow model is whichever one did not serve the request
+        shadow = CANDIDATE if arm == CURRENT else CURRENT
+        rows = np.vstack([row for _, row, _ in items])
+        served = np.vstack([probs for _, _, probs in items])
+        try:
+            with SHADOW_BATCH_SECONDS.time():
+                shadowed = self.predict_proba(shadow, rows)
+        except Exception as e:
+            metrics.PREDICTION_ERRORS.inc(len(items), stage="shadow")
+            print(f"Shadow scoring failed: {e}")
+            return
+        current, candidate = (served, shadowed) if arm == CURRENT else (shadowed, served)
+        current_tier = current.argmax(axis=1)
+        candidate_tier = candidate.argmax(axis=1)
+        shift = candidate - current
+        max_shift = np.abs(shift).max(axis=1)
+        agree = int((current_tier == candidate_tier).sum())
+        with self._lock:
+            stats = self._stats[arm]
+            stats['count'] += len(items)
+            stats['agree'] += agree
+            np.add.at(stats['confusion'], (current_tier, candidate_tier), 1)
+            stats['shift_sum'] += shift.sum(axis=0)
+            stats['abs_shift_sum'] += float(max_shift.sum())
+        SHADOW_SCORED.inc(len(items), arm=arm)
+        SHADOW_AGREEMENT.inc(agree, arm=arm)
+        for value in max_shift:
+            SHADOW_PROB_SHIFT.observe(float(value))
+
+    # Agreement summary per serving arm and overall
+    def stats(self):
+        with self._lock:
+            snapshot = {
+                arm: {key: (value.copy() if isinstance(value, np.ndarray) else value) for key, value in stats.items()}
+                for arm, stats in self._stats.items()
+            }
+        total = {
+            'count': sum(s['count'] for s in snapshot.values()),
+            'agree': sum(s['agree'] for s in snapshot.values()),
+            'confusion': sum(s['confusion'] for s in snapshot.values()),
+            'shift_sum': sum(s['shift_sum'] for s in snapshot.values()),
+            'abs_shift_sum': sum(s['abs_shift_sum'] for s in snapshot.values()),
+        }
+        summary = {}
+        for name, s in list(snapshot.items()) + [('all', total)]:
+            count = s['count']
+            summary[name] = {
+                'count': count,
+                'agreement': s['agree'] / count if count else None,
+                'mean_abs_shift': s['abs_shift_sum'] / count if count else None,
+                'mean_shift_by_class': (s['shift_sum'] / count).tolist() if count else None,
+                'confusion': s['confusion'].tolist(),
+            }
+        summary['pending'] = self._queue.qsize()
+        return summary
+
+    # Wait until everything submitted so far has been scored
+    def drain(self):
+        self._queue.join()
+
+    def close(self):
+        self._stopped.set()
+        self._worker.join()
+
+
+# Build a scorer from MOBICOST_CANDIDATE_MODEL / MOBICOST_CANDIDATE_SCALER /
+# MOBICOST_AB_SPLIT, or return None when no candidate is configured
+def from_environment(current):
+    candidate_path = os.environ.get("MOBICOST_CANDIDATE_MODEL")
+    if not candidate_path:
+        return None
+    candidate = load_model(candidate_path, os.environ.get("MOBICOST_CANDIDATE_SCALER", SCALER_PATH))
+    split = float(os.environ.get("MOBICOST_AB_SPLIT", "0"))
+    if not 0 <= split <= 1:
+        raise ValueError(f"MOBICOST_AB_SPLIT must be between 0 and 1, got {split}")
+    return ShadowScorer(current, candidate, split=split)
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import re
+import socket
+import sys
+import urllib.request
+
+import pytest
+
+pytest.importorskip("websockets")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from streamlit_session import SessionClient, StreamlitServer  # noqa: E402
+
+PREDICT = "PREDICT PRICE RANGE"
+RESULT = re.compile(r'<div class="result-value">\S+ ([\w-]+)</div>')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StreamlitServer("app.py", free_port(), env={"MOBICOST_METRICS_PORT": "0"}) as server:
+        yield server
+
+
+@pytest.fixture(scope="module")
+def expiring_server():
+    env = {"MOBICOST_METRICS_PORT": str(free_port()), "MOBICOST_SESSION_IDLE_SECONDS": "1"}
+    with StreamlitServer("app.py", free_port(), env=env) as server:
+        yield server
+
+
+def expired_sessions(server):
+    url = f"http://127.0.0.1:{server.env['MOBICOST_METRICS_PORT']}/metrics"
+    with urllib.request.urlopen(url, timeout=5) as response:
+        for line in response.read().decode().splitlines():
+            if line.startswith("mobicost_sessions_expired_total "):
+                return float(line.split()[1])
+    return 0.0
+
+
+def predicted_tier(run):
+    return next(m.group(1) for body in run.markdown for m in [RESULT.search(body)] if m)
+
+
+async def predict_with_ram(client, ram):
+    await client.set_value("RAM (MB)", ram)
+    return predicted_tier(await client.click(PREDICT))
+
+
+async def predict_twice(url):
+    client = SessionClient(url)
+    await client.connect()
+    try:
+        ram_id = client.find("RAM (MB)").id
+        tiers = [await predict_with_ram(client, 600.0), await predict_with_ram(client, 15000.0)]
+        return tiers, client.find("RAM (MB)").id == ram_id
+    finally:
+        await client.close()
+
+
+# Each PREDICT must score what the form submitted, even after the previous
+# PREDICT changed the spec record the sliders start from
+def test_consecutive_predictions_use_the_submitted_values(server):
+    tiers, same_slider = asyncio.run(predict_twice(server.url))
+
+    assert tiers == ["Mid-Range", "Luxury"]
+    assert same_slider
+
+
+async def predict_after_idle(server):
+    client = SessionClient(server.url)
+    await client.connect()
+    try:
+        first = await predict_with_ram(client, 600.0)
+        deadline = asyncio.get_running_loop().time() + 10
+        while not expired_sessions(server) and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.5)
+        expired = expired_sessions(server)
+        return first, predicted_tier(await client.click(PREDICT)), expired
+    finally:
+        await client.close()
+
+
+# A session whose state expired while idle scores what its page still shows
+def test_prediction_after_idle_expiry_keeps_the_shown_values(expiring_server):
+    first, after_idle, expired = asyncio.run(predict_after_idle(expiring_server))
+
+    assert expired >= 1
+    assert first == after_idle == "Mid-Range"
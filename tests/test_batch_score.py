@@ -0,0 +1,70 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from batch_score import score_file
+from scoring import load_model, read_dataset
+from validation import Validator
+
+OUTPUT_COLUMNS = ['price_range', 'price_label', 'confidence', 'prob_0', 'prob_1', 'prob_2', 'prob_3']
+
+
+@pytest.fixture(scope="module")
+def model():
+    return load_model()
+
+
+@pytest.fixture
+def catalog():
+    # dataset.csv already has a ground-truth price_range column
+    return read_dataset().head(500)
+
+
+def test_arrow_output_replaces_existing_columns(tmp_path, model, catalog):
+    source = tmp_path / "catalog.parquet"
+    catalog.to_parquet(source, index=False)
+    first = tmp_path / "scored.parquet"
+    second = tmp_path / "rescored.parquet"
+
+    score_file(str(source), str(first), *model, chunksize=200, validator=Validator())
+    score_file(str(first), str(second), *model, chunksize=200, validator=Validator())
+
+    for path in (first, second):
+        names = pq.read_table(path).schema.names
+        assert len(names) == len(set(names))
+        assert names == list(catalog.columns) + OUTPUT_COLUMNS[1:]
+    pd.testing.assert_frame_equal(pd.read_parquet(first), pd.read_parquet(second))
+
+
+def test_arrow_and_csv_paths_agree(tmp_path, model, catalog):
+    source = tmp_path / "catalog.csv"
+    catalog.to_csv(source, index=False)
+    score_file(str(source), str(tmp_path / "scored.csv"), *model, validator=Validator())
+    score_file(str(source), str(tmp_path / "scored.parquet"), *model, validator=Validator())
+
+    csv = pd.read_csv(tmp_path / "scored.csv")
+    arrow = pd.read_parquet(tmp_path / "scored.parquet")
+    assert list(csv.columns) == list(arrow.columns)
+    assert (csv['price_range'] == arrow['price_range']).all()
+    assert (csv['price_label'] == arrow['price_label'].astype(str)).all()
+    assert (csv['confidence'] - arrow['confidence']).abs().max() < 1e-6
+
+
+def test_dirty_value_past_the_first_csv_block_is_validated(tmp_path, model):
+    # Well over pyarrow's 1 MB CSV block, so the dirty row is in a later block
+    # than the one Arrow would infer column types from
+    specs = read_dataset().sample(30000, replace=True, random_state=0).reset_index(drop=True)
+    specs['ram'] = specs['ram'].astype(object)
+    specs.loc[29000, 'ram'] = "4 GB"
+    source = tmp_path / "catalog.csv"
+    specs.to_csv(source, index=False)
+    assert source.stat().st_size > 2 ** 20
+
+    validator = Validator()
+    rows = score_file(str(source), str(tmp_path / "scored.parquet"), *model, validator=validator)
+
+    scored = pd.read_parquet(tmp_path / "scored.parquet")
+    assert rows == len(scored) == len(specs)
+    assert scored.loc[29000, 'ram'] == 4096
+    assert scored['ram'].dtype == 'int64'
+    assert validator.summary()['unit_converted'] == {'ram': 1}
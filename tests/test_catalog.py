@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+import catalog
+import metrics
+from scoring import RAW_FEATURES, load_model, predict, read_dataset
+
+
+@pytest.fixture(scope="module")
+def model():
+    return load_model()
+
+
+@pytest.fixture
+def specs():
+    return read_dataset()[RAW_FEATURES].head(300)
+
+
+def test_scores_match_the_model(model, specs):
+    scored, rescored = catalog.score_catalog(specs, *model, catalog.ScoreStore(), "v1")
+    prediction, probabilities = predict(*model, specs)
+
+    assert rescored == len(specs)
+    assert (scored['price_range'].to_numpy() == prediction).all()
+    assert np.allclose(scored['confidence'], probabilities.max(axis=1), atol=1e-6)
+    assert list(scored.columns) == RAW_FEATURES + ['price_range', 'price_label', 'confidence']
+
+
+def test_only_changed_rows_are_rescored(model, specs):
+    store = catalog.ScoreStore()
+    first, _ = catalog.score_catalog(specs, *model, store, "v1")
+    edited = specs.copy()
+    edited.loc[edited.index[:10], 'ram'] += 500
+
+    second, rescored = catalog.score_catalog(edited, *model, store, "v1")
+    assert rescored == 10
+    assert (second['price_range'].iloc[10:].to_numpy() == first['price_range'].iloc[10:].to_numpy()).all()
+    assert (second['price_range'].to_numpy() == predict(*model, edited)[0]).all()
+
+
+def test_new_model_version_rescores_everything(model, specs):
+    store = catalog.ScoreStore()
+    catalog.score_catalog(specs, *model, store, "v1")
+
+    assert catalog.score_catalog(specs, *model, store, "v1")[1] == 0
+    assert catalog.score_catalog(specs, *model, store, "v2")[1] == len(specs)
+
+
+def test_duplicate_rows_are_scored_once(model, specs):
+    store = catalog.ScoreStore()
+    doubled = specs.iloc[np.r_[0:50, 0:50]]
+    scored, _ = catalog.score_catalog(doubled, *model, store, "v1")
+
+    assert len(store) == 50
+    assert (scored['price_range'].iloc[:50].to_numpy() == scored['price_range'].iloc[50:].to_numpy()).all()
+
+
+def test_page_filters_and_sorts(model, specs):
+    scored, _ = catalog.score_catalog(specs, *model, catalog.ScoreStore(), "v1")
+    rows, matching, pages = catalog.page(scored, tiers=['Luxury'], sort_by='ram', page_size=25)
+
+    assert matching == (scored['price_label'] == 'Luxury').sum()
+    assert pages == -(-matching // 25)
+    assert (rows['price_label'] == 'Luxury').all()
+    assert rows['ram'].is_monotonic_decreasing
+
+
+def test_store_keeps_the_most_recently_used_rows(model, specs):
+    store = catalog.ScoreStore(max_rows=250)
+    first, second = specs.iloc[:200], specs.iloc[200:]
+    catalog.score_catalog(first, *model, store, "v1")
+    catalog.score_catalog(first.iloc[:100], *model, store, "v1")
+    catalog.score_catalog(second, *model, store, "v1")
+
+    assert len(store) == 250
+    # The 100 rows looked up again outlive the other half of the first upload
+    assert catalog.score_catalog(first.iloc[:100], *model, store, "v1")[1] == 0
+    assert catalog.score_catalog(second, *model, store, "v1")[1] == 0
+    assert catalog.score_catalog(first.iloc[100:], *model, store, "v1")[1] > 0
+
+
+def test_store_drops_rows_of_other_model_versions(model, specs):
+    store = catalog.ScoreStore()
+    catalog.score_catalog(specs, *model, store, "v1")
+    catalog.score_catalog(specs.head(10), *model, store, "v2")
+
+    assert len(store) == 10
+    assert store.nbytes == 10 * 32
+
+
+def test_store_size_is_exported(model, specs):
+    registry = metrics.Registry()
+    store = catalog.ScoreStore().register_metrics(registry)
+    catalog.score_catalog(specs, *model, store, "v1")
+
+    text = registry.render()
+    assert f"mobicost_score_store_rows {len(specs)}" in text
+    assert f"mobicost_score_store_bytes {len(specs) * 32}" in text
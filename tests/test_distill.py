@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from distill import fit_student
+from scoring import FEATURE_LIST, LiteModel
+
+
+def toy_problem(rng, n=400):
+    # Features on very different scales, like RAM in MB next to flags
+    scales = np.logspace(-1, 4, len(FEATURE_LIST))
+    X = rng.normal(size=(n, len(FEATURE_LIST))) * scales + scales
+    y = np.digitize(X[:, 0] / scales[0] + X[:, -1] / scales[-1], [0.5, 2.0, 3.5])
+    return X, y
+
+
+def test_lite_model_round_trips(tmp_path):
+    rng = np.random.default_rng(0)
+    model = LiteModel(rng.normal(size=(4, len(FEATURE_LIST))), rng.normal(size=4))
+    path = tmp_path / "lite.npz"
+    model.save(str(path))
+
+    loaded = LiteModel.load(str(path))
+    assert loaded.features == FEATURE_LIST
+    X = pd.DataFrame(rng.normal(size=(20, len(FEATURE_LIST))), columns=FEATURE_LIST)
+    np.testing.assert_array_equal(loaded.predict_proba(X), model.predict_proba(X))
+
+
+def test_folded_student_matches_a_model_on_standardised_inputs():
+    X, y = toy_problem(np.random.default_rng(1))
+    student = fit_student(X, np.eye(4)[y], C=1.0)
+
+    mean, scale = X.mean(axis=0), X.std(axis=0)
+    reference = LogisticRegression(C=1.0, max_iter=2000).fit((X - mean) / scale, y)
+
+    np.testing.assert_allclose(student.predict_proba(X), reference.predict_proba((X - mean) / scale), atol=1e-6)
+    assert (student.predict(X) == y).mean() > 0.9
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import metrics
+from drift import DriftMonitor, build_reference, population_stability_index
+
+FEATURES = ['ram', 'battery_power']
+
+
+@pytest.fixture
+def training():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'ram': rng.uniform(256, 4000, 5000), 'battery_power': rng.uniform(500, 2000, 5000)})
+
+
+@pytest.fixture
+def reference(training):
+    return build_reference(training, features=FEATURES)
+
+
+def test_matching_traffic_has_no_drift(training, reference):
+    monitor = DriftMonitor(reference)
+    monitor.update_batch(training.sample(2000, random_state=1))
+
+    scores = monitor.scores()
+    assert scores['ram']['psi'] < 0.02
+    assert abs(scores['ram']['mean_shift']) < 0.1
+    assert scores['ram']['out_of_range_rate'] == 0
+
+
+def test_shifted_traffic_is_flagged(reference):
+    monitor = DriftMonitor(reference)
+    for ram in (8000, 12000, 16000):
+        assert monitor.update({'ram': ram, 'battery_power': 1000}) == {'ram': ram}
+
+    scores = monitor.scores()
+    assert scores['ram']['out_of_range_rate'] == 1.0
+    assert scores['ram']['psi'] > 0.25
+    assert scores['battery_power']['out_of_range_rate'] == 0
+
+
+def test_batch_and_single_updates_agree(reference):
+    rng = np.random.default_rng(2)
+    specs = pd.DataFrame({'ram': rng.uniform(0, 6000, 300), 'battery_power': rng.uniform(400, 2500, 300)})
+    single, batched = DriftMonitor(reference), DriftMonitor(reference)
+    for record in specs.to_dict('records'):
+        single.update(record)
+    mask = np.concatenate([batched.update_batch(specs[:100]), batched.update_batch(specs[100:])])
+
+    assert mask.tolist() == [bool(single.out_of_range(r)) for r in specs.to_dict('records')]
+    for feature in FEATURES:
+        for key, value in single.scores()[feature].items():
+            assert batched.scores()[feature][key] == pytest.approx(value)
+
+
+def test_psi_of_identical_distributions_is_zero():
+    assert population_stability_index([0.25, 0.25, 0.5], [0.25, 0.25, 0.5]) == 0
+
+
+def test_metrics_export_psi_per_feature(reference):
+    registry = metrics.Registry()
+    monitor = DriftMonitor(reference).register_metrics(registry)
+    monitor.update({'ram': 9000, 'battery_power': 1000})
+
+    text = registry.render()
+    assert 'mobicost_input_out_of_range_ratio{feature="ram"} 1' in text
+    assert 'mobicost_input_out_of_range_ratio{feature="battery_power"} 0' in text
@@ -0,0 +1,29 @@
+import json
+
+from feature_importance import load_importance
+
+
+def write_artifact(path, version):
+    path.write_text(json.dumps({
+        'model_version': version,
+        'buckets': {'RAM': {'mean': 0.6, 'std': 0.02}, 'Processor': {'mean': -0.001, 'std': 0.003}},
+    }))
+
+
+def test_matching_version_is_loaded(tmp_path):
+    path = tmp_path / "importance.json"
+    write_artifact(path, "abc123")
+
+    assert load_importance(str(path), version="abc123") == {'RAM': 0.6, 'Processor': 0.0}
+
+
+def test_stale_artifact_is_ignored(tmp_path, capsys):
+    path = tmp_path / "importance.json"
+    write_artifact(path, "abc123")
+
+    assert load_importance(str(path), version="def456") is None
+    assert "Rerun feature_importance.py" in capsys.readouterr().out
+
+
+def test_missing_artifact(tmp_path):
+    assert load_importance(str(tmp_path / "missing.json")) is None
@@ -0,0 +1,86 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def registry():
+    return metrics.Registry()
+
+
+@pytest.fixture
+def scrape(registry):
+    server = metrics.start_http_server(0, registry=registry)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def fetch(path="/metrics"):
+        with urllib.request.urlopen(base + path, timeout=5) as response:
+            assert response.headers['Content-Type'] == metrics.CONTENT_TYPE
+            return response.read().decode()
+
+    yield fetch
+    server.shutdown()
+    server.server_close()
+
+
+def sample_lines(text):
+    return [line for line in text.splitlines() if line and not line.startswith("#")]
+
+
+def test_counter_exposition(registry, scrape):
+    counter = registry.counter("test_requests_total", "Requests", ["tier"])
+    counter.inc(tier="Budget")
+    counter.inc(2, tier="Luxury")
+
+    text = scrape()
+    assert "# HELP test_requests_total Requests" in text
+    assert "# TYPE test_requests_total counter" in text
+    assert sample_lines(text) == ['test_requests_total{tier="Budget"} 1', 'test_requests_total{tier="Luxury"} 2']
+
+
+def test_histogram_buckets_are_cumulative(registry, scrape):
+    histogram = registry.histogram("test_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+
+    assert sample_lines(scrape()) == [
+        'test_seconds_bucket{le="0.1"} 1',
+        'test_seconds_bucket{le="1"} 3',
+        'test_seconds_bucket{le="+Inf"} 4',
+        'test_seconds_sum 6.05',
+        'test_seconds_count 4',
+    ]
+
+
+def test_label_values_are_escaped(registry, scrape):
+    counter = registry.counter("test_errors_total", "Errors", ["stage"])
+    counter.inc(stage='say "hi"\\\n')
+
+    assert sample_lines(scrape()) == ['test_errors_total{stage="say \\"hi\\"\\\\\\n"} 1']
+
+
+def test_unknown_path_is_404(scrape):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        scrape("/other")
+    assert error.value.code == 404
+
+
+def test_reregistering_returns_the_same_metric(registry):
+    assert registry.counter("test_total", "Total") is registry.counter("test_total", "Total")
+    with pytest.raises(ValueError):
+        registry.gauge("test_total", "Total")
+
+
+def test_failing_callback_drops_only_its_samples(registry, scrape):
+    def broken():
+        raise RuntimeError("private API moved")
+
+    registry.callback_gauge("test_broken", "Broken", callback=broken)
+    registry.callback_gauge("test_working", "Working", callback=lambda: {(): 3})
+
+    text = scrape()
+    assert "# TYPE test_broken gauge" in text
+    assert sample_lines(text) == ["test_working 3"]
@@ -0,0 +1,88 @@
+import glob
+import os
+import threading
+import tracemalloc
+
+import pytest
+
+import profiling
+
+
+def sample_files(directory):
+    return sorted(os.path.basename(path) for path in glob.glob(os.path.join(directory, "*")))
+
+
+def work():
+    return [str(i) for i in range(2000)]
+
+
+def test_rate_zero_never_profiles(tmp_path):
+    profiler = profiling.Profiler(str(tmp_path), rate=0.0)
+    for _ in range(50):
+        with profiler.profile("predict"):
+            work()
+
+    assert sample_files(tmp_path) == []
+
+
+def test_rate_outside_zero_to_one_is_rejected():
+    with pytest.raises(ValueError):
+        profiling.Profiler(rate=1.5)
+
+
+def test_only_the_right_token_forces_a_sample(tmp_path):
+    profiler = profiling.Profiler(str(tmp_path), token="secret")
+    assert not profiling.Profiler(str(tmp_path)).authorised("")
+
+    for value in ("wrong", "", None):
+        with profiler.profile("predict", force=profiler.authorised(value)):
+            work()
+    assert sample_files(tmp_path) == []
+
+    with profiler.profile("predict", force=profiler.authorised("secret")):
+        work()
+    assert [os.path.splitext(name)[1] for name in sample_files(tmp_path)] == [".heap", ".json", ".prof"]
+    assert profiling.list_samples(str(tmp_path))[0]['target'] == "predict"
+
+
+def test_only_the_newest_samples_are_kept(tmp_path):
+    profiler = profiling.Profiler(str(tmp_path), keep=2)
+    for _ in range(5):
+        with profiler.profile("predict", force=True):
+            work()
+
+    assert len(sample_files(tmp_path)) == 2 * 3
+    assert len(profiling.list_samples(str(tmp_path))) == 2
+
+
+def test_nested_blocks_write_one_sample(tmp_path):
+    profiler = profiling.Profiler(str(tmp_path))
+
+    def nested():
+        with profiler.profile("predict", force=True):
+            with profiler.profile("load_image", force=True):
+                work()
+
+    thread = threading.Thread(target=nested)
+    thread.start()
+    thread.join(timeout=30)
+
+    assert not thread.is_alive()
+    assert [s['target'] for s in profiling.list_samples(str(tmp_path))] == ["predict"]
+    # The lock is free again for the next request
+    with profiler.profile("predict", force=True):
+        work()
+    assert len(profiling.list_samples(str(tmp_path))) == 2
+
+
+def test_heap_snapshot_leaves_out_the_profiler(tmp_path):
+    profiler = profiling.Profiler(str(tmp_path))
+    with profiler.profile("predict", force=True):
+        kept = work()
+
+    sample, = profiling.list_samples(str(tmp_path))
+    snapshot = tracemalloc.Snapshot.load(sample['stem'] + ".heap")
+    files = {trace.traceback[-1].filename for trace in snapshot.traces}
+    assert __file__ in files
+    assert profiling.__file__ not in files
+    assert kept
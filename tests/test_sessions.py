@@ -0,0 +1,96 @@
+import pytest
+from streamlit.runtime.state.common import GENERATED_ELEMENT_ID_PREFIX
+
+import metrics
+import sessions
+
+WIDGET_ID = f"{GENERATED_ELEMENT_ID_PREFIX}-slider-ram"
+
+
+class StubSession:
+    def __init__(self, session_id, state):
+        self.id = session_id
+        self.session_state = state
+
+
+@pytest.fixture
+def live():
+    return [
+        StubSession("a", {
+            sessions.SPEC_KEY: sessions.new_spec(), sessions.widget_key('ram'): 600, WIDGET_ID: True,
+            '_session_id': "a",
+        }),
+        StubSession("b", {sessions.SPEC_KEY: sessions.new_spec(), sessions.CATALOG_KEY: "catalog-key"}),
+    ]
+
+
+def test_spec_record_round_trips():
+    spec = sessions.new_spec({'ram': 3000, 'clock_speed': 1.7, 'blue': 0, 'pixel_density': 123})
+
+    assert sessions.spec_value(spec, 'ram') == 3000
+    assert sessions.spec_value(spec, 'clock_speed') == pytest.approx(1.7)
+    assert sessions.spec_value(spec, 'blue') is False
+    assert sessions.spec_value(spec, 'battery_power') == sessions.SPEC_DEFAULTS['battery_power']
+    assert spec.nbytes == 62
+
+
+def test_shared_cache_evicts_least_recently_used():
+    cache = sessions.SharedCache(max_bytes=2500)
+    for key in "abc":
+        cache.put(key, b"x" * 1000)
+        cache.get('a')
+
+    assert cache.get('a') is not None
+    assert cache.get('b') is None
+    assert cache.get('c') is not None
+    assert cache.nbytes <= 2500
+
+
+def test_usage_groups_widget_keys(live):
+    usage = sessions.SessionTracker(list_sessions=lambda: live).usage()
+
+    assert set(usage) == {"a", "b"}
+    assert set(usage["a"]) == {sessions.SPEC_KEY, 'widgets', 'other'}
+    assert set(usage["b"]) == {sessions.SPEC_KEY, sessions.CATALOG_KEY}
+
+
+def test_scrape_walks_session_state_once(live):
+    calls = []
+
+    def list_sessions():
+        calls.append(1)
+        return live
+
+    registry = metrics.Registry()
+    sessions.SessionTracker(list_sessions=list_sessions).register_metrics(registry=registry)
+    calls.clear()
+    text = registry.render()
+
+    assert 'mobicost_session_state_bytes{key="widgets"}' in text
+    assert 'mobicost_session_state_max_bytes' in text
+    # One walk for both byte gauges, one listing for the session count
+    assert len(calls) == 2
+
+
+def test_idle_sessions_keep_only_the_spec_record(live):
+    tracker = sessions.SessionTracker(idle_seconds=60, list_sessions=lambda: live)
+    tracker.touch("a")
+    tracker.touch("b")
+    assert tracker.expire_idle() == 0
+
+    tracker.idle_seconds = 0
+    assert tracker.expire_idle() == 2
+    assert set(live[0].session_state) == {sessions.SPEC_KEY, '_session_id'}
+    assert set(live[1].session_state) == {sessions.SPEC_KEY}
+    assert tracker.expire_idle() == 0
+
+
+def test_failing_private_api_leaves_metrics_up(monkeypatch):
+    from streamlit.runtime import Runtime
+
+    monkeypatch.setattr(Runtime, "exists", staticmethod(lambda: True))
+    monkeypatch.setattr(Runtime, "instance", staticmethod(lambda: object()))
+    registry = metrics.Registry()
+    sessions.SessionTracker().register_metrics(registry=registry)
+
+    assert "mobicost_sessions 0" in registry.render()
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from scoring import FEATURE_LIST, engineer_features, load_model, read_dataset
+from shadow import CANDIDATE, CURRENT, ShadowScorer, assign_arm
+
+
+class IdentityScaler:
+    def transform(self, X):
+        return X
+
+
+# Always predicts `tier` with probability 1
+class ConstantModel:
+    def __init__(self, tier):
+        self.tier = tier
+
+    def predict_proba(self, X):
+        probabilities = np.zeros((len(X), 4))
+        probabilities[:, self.tier] = 1.0
+        return probabilities
+
+
+def served(tier, n=1):
+    probabilities = np.zeros((n, 4))
+    probabilities[:, tier] = 1.0
+    return probabilities
+
+
+@pytest.fixture
+def scorer_factory():
+    scorers = []
+
+    def make(current, candidate, **kwargs):
+        scorer = ShadowScorer(current, candidate, max_wait=0.01, **kwargs)
+        scorers.append(scorer)
+        return scorer
+
+    yield make
+    for scorer in scorers:
+        scorer.close()
+
+
+def test_identical_models_agree(scorer_factory):
+    model = load_model()
+    scorer = scorer_factory(model, model)
+    specs = engineer_features(read_dataset().head(200))[FEATURE_LIST].to_numpy(dtype=float)
+    for row in specs:
+        scorer.submit(row, scorer.predict_proba(CURRENT, row[None, :])[0])
+    scorer.drain()
+
+    stats = scorer.stats()
+    assert stats['all']['count'] == 200
+    assert stats['all']['agreement'] == 1.0
+    assert stats['all']['mean_abs_shift'] == pytest.approx(0, abs=1e-6)
+
+
+def test_disagreement_fills_the_confusion_matrix(scorer_factory):
+    scaler = IdentityScaler()
+    scorer = scorer_factory((ConstantModel(0), scaler), (ConstantModel(3), scaler))
+    row = np.zeros(len(FEATURE_LIST))
+    for _ in range(5):
+        scorer.submit(row, served(0), arm=CURRENT)
+    for _ in range(3):
+        scorer.submit(row, served(3), arm=CANDIDATE)
+    scorer.drain()
+
+    stats = scorer.stats()
+    assert stats[CURRENT]['count'] == 5
+    assert stats[CANDIDATE]['count'] == 3
+    assert stats['all']['agreement'] == 0
+    assert stats['all']['confusion'][0][3] == 8
+    assert stats['all']['mean_shift_by_class'] == [-1.0, 0.0, 0.0, 1.0]
+
+
+def test_feature_dicts_are_accepted(scorer_factory):
+    scaler = IdentityScaler()
+    scorer = scorer_factory((ConstantModel(1), scaler), (ConstantModel(1), scaler))
+    scorer.submit({f: 1.0 for f in FEATURE_LIST}, served(1)[0])
+    scorer.drain()
+
+    assert scorer.stats()['all']['agreement'] == 1.0
+
+
+def test_arm_assignment_is_stable_and_follows_the_split():
+    sessions = [f"session-{i}" for i in range(4000)]
+    arms = [assign_arm(s, 0.25) for s in sessions]
+
+    assert arms == [assign_arm(s, 0.25) for s in sessions]
+    assert arms.count(CANDIDATE) / len(arms) == pytest.approx(0.25, abs=0.03)
+    assert {assign_arm(s, 0) for s in sessions} == {CURRENT}
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from scoring import RAW_FEATURES, read_dataset
+from validation import BATCH_LIMITS, Validator, describe
+
+
+@pytest.fixture
+def specs():
+    return read_dataset()[RAW_FEATURES].head(8).reset_index(drop=True)
+
+
+def dirty(specs):
+    df = specs.astype(object)
+    df.loc[0, 'ram'] = "4 GB"
+    df.loc[1, 'clock_speed'] = "2300 MHz"
+    df.loc[2, 'blue'] = "yes"
+    df.loc[3, 'ram'] = 3
+    df.loc[4, 'battery_power'] = 12000
+    df.loc[5, 'ram'] = None
+    df.loc[6, 'pc'] = "lots"
+    return df
+
+
+def test_clean_input_passes_through(specs):
+    validator = Validator()
+    out, report = validator.validate_frame(specs)
+
+    assert out is specs
+    assert report.empty
+    assert validator.summary() == {issue: {} for issue in validator.summary()}
+
+
+def test_text_units_and_gb_ram_are_normalised(specs):
+    out, report = Validator().validate_frame(dirty(specs))
+
+    assert out.loc[0, 'ram'] == 4096
+    assert out.loc[1, 'clock_speed'] == pytest.approx(2.3)
+    assert out.loc[2, 'blue'] == 1
+    assert out.loc[3, 'ram'] == 3072
+    assert out.loc[4, 'battery_power'] == BATCH_LIMITS['battery_power'][1]
+    assert out['ram'].dtype == np.int64 and out['clock_speed'].dtype == np.float64
+    assert list(describe(report)) == [
+        "ram:unit_converted",
+        "clock_speed:unit_converted",
+        "ram:unit_converted",
+        "battery_power:clipped",
+        "ram:missing",
+        "pc:not_numeric",
+    ]
+
+
+def test_missing_and_unparseable_rows_are_rejected(specs):
+    out, report = Validator().validate_frame(dirty(specs))
+
+    assert list(out.index) == [0, 1, 2, 3, 4, 7]
+    assert report.loc[report['rejected'], 'row'].tolist() == [5, 6]
+
+
+def test_reject_mode_drops_out_of_range_rows(specs):
+    validator = Validator(on_out_of_range='reject')
+    out, report = validator.validate_frame(dirty(specs))
+
+    assert 4 not in out.index
+    assert describe(report)[report['row'] == 4].tolist() == ["battery_power:out_of_range"]
+    assert validator.rejected == 3
+
+
+def test_missing_column_raises(specs):
+    with pytest.raises(ValueError, match="missing required columns: ram"):
+        Validator().validate_frame(specs.drop(columns='ram'))
+
+
+def test_rows_are_numbered_across_chunks(specs):
+    validator = Validator()
+    df = dirty(specs)
+    reports = [validator.validate_frame(df.iloc[i:i + 3])[1] for i in range(0, len(df), 3)]
+
+    assert pd.concat(reports)['row'].tolist() == [0, 1, 3, 4, 5, 6]
+    assert validator.rows == len(df)
+    assert validator.summary()['unit_converted'] == {'ram': 2, 'clock_speed': 1}
+
+
+def test_batches_match_frames(specs):
+    df = dirty(specs).astype(str).replace("None", "")
+    frame, frame_report = Validator().validate_frame(df)
+    batch, batch_report = Validator().validate_batch(pa.RecordBatch.from_pandas(df, preserve_index=False))
+
+    pd.testing.assert_frame_equal(batch.to_pandas(), frame.reset_index(drop=True), check_dtype=False)
+    pd.testing.assert_frame_equal(batch_report, frame_report)
+    assert batch.schema.metadata is None
+
+
+def test_fractional_integer_specs_are_rounded_and_reported(specs):
+    df = specs.astype(object)
+    df.loc[0, 'n_cores'] = 2.5
+    df.loc[1, 'ram'] = 2549.7
+    df.loc[2, 'mobile_wt'] = "0.1805 kg"
+    df.loc[3, 'clock_speed'] = 2.25
+    out, report = Validator().validate_frame(df)
+
+    assert out.loc[0, 'n_cores'] == 2
+    assert out.loc[1, 'ram'] == 2550
+    assert out.loc[2, 'mobile_wt'] == 180
+    assert out.loc[3, 'clock_speed'] == pytest.approx(2.25)
+    assert list(describe(report)) == [
+        "n_cores:rounded",
+        "ram:rounded",
+        "mobile_wt:unit_converted; mobile_wt:rounded",
+    ]
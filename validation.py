@@ -0,0 +1,275 @@
+# Streaming, vectorised validation and normalisation of spec catalogs
+#
+# Supplier catalogs arrive with missing columns, text in numeric fields, RAM
+# in GB instead of MB and specs outside the ranges the app's sliders allow.
+# `Validator` cleans one chunk at a time (a DataFrame or an Arrow record
+# batch) with whole-column NumPy operations. Only columns that arrive as text
+# go through pandas string parsing. Per chunk it:
+#
+# - raises ValueError when a required column is missing
+# - coerces text such as "4 GB", "2.3GHz" or "yes" to numbers, converting
+#   units to the slider units
+# - treats bare `ram` values up to RAM_GB_MAX as GB and converts them to MB
+# - clips values outside BATCH_LIMITS, or rejects their rows with
+#   on_out_of_range="reject"
+# - rounds fractional values of integer specs (e.g. n_cores=2.5)
+# - rejects rows with missing or unparseable specs
+#
+# Output spec columns are int64, apart from float64 clock_speed. Clean columns
+# that already have that dtype pass through untouched, including Arrow's
+# zero-copy buffers.
+#
+# The report has one row per flagged input row: its position in the stream,
+# whether it was rejected, and one uint32 bitmask per issue with bit i set for
+# RAW_FEATURES[i].
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import metrics
+from scoring import BOOLEAN_SPECS, FLOAT_SPECS, RAW_FEATURES
+
+# Slider bounds of the app's spec form
+SPEC_LIMITS = {
+    'battery_power': (500, 7000),
+    'blue': (0, 1),
+    'clock_speed': (0.5, 5.0),
+    'dual_sim': (0, 1),
+    'fc': (0, 100),
+    'four_g': (0, 1),
+    'int_memory': (2, 1024),
+    'mobile_wt': (80, 300),
+    'n_cores': (1, 16),
+    'pc': (0, 200),
+    'px_height': (0, 3000),
+    'px_width': (0, 4000),
+    'ram': (500, 16000),
+    'sc_h': (5, 25),
+    'sc_w': (5, 15),
+    'talk_time': (2, 40),
+    'three_g': (0, 1),
+    'touch_screen': (0, 1),
+    'wifi': (0, 1),
+}
+
+# The training data goes below two slider minimums (ram from 256 MB, sc_w from
+# 0 cm) and above the sc_w maximum. Batch input uses the wider bounds, so rows
+# like the ones the model was trained on are never clipped.
+BATCH_LIMITS = {**SPEC_LIMITS, 'ram': (256, 16000), 'sc_w': (0, 18)}
+
+# Unit suffixes accepted in text values, as multipliers to the slider unit
+UNIT_SUFFIXES = {
+    'ram': {'mb': 1, 'gb': 1024},
+    'int_memory': {'gb': 1, 'mb': 1 / 1024, 'tb': 1024},
+    'clock_speed': {'ghz': 1, 'mhz': 1 / 1000},
+    'battery_power': {'mah': 1},
+    'mobile_wt': {'g': 1, 'kg': 1000},
+    'pc': {'mp': 1},
+    'fc': {'mp': 1},
+    'sc_h': {'cm': 1, 'mm': 0.1},
+    'sc_w': {'cm': 1, 'mm': 0.1},
+    'talk_time': {'h': 1},
+    'px_height': {'px': 1},
+    'px_width': {'px': 1},
+}
+
+BOOLEAN_WORDS = {'true': 1.0, 'yes': 1.0, 'y': 1.0, 'false': 0.0, 'no': 0.0, 'n': 0.0}
+
+# No phone has 64 MB of RAM; smaller bare values are GB
+RAM_GB_MAX = 64
+
+ISSUES = ['missing', 'not_numeric', 'unit_converted', 'clipped', 'out_of_range', 'rounded']
+REJECTING_ISSUES = ['missing', 'not_numeric', 'out_of_range']
+
+VALIDATION_ROWS = metrics.REGISTRY.counter(
+    "mobicost_validation_rows_total", "Catalog rows by validation result", ["result"]
+)
+
+_NUMBER_WITH_UNIT = r'^([-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)\s*([a-z]*)$'
+
+
+def _canonical_dtype(feature):
+    return np.dtype(np.float64) if feature in FLOAT_SPECS else np.dtype(np.int64)
+
+
+# Parse a column of text; returns (values, missing, explicit unit, converted)
+def _parse_text(values, feature):
+    series = pd.Series(values, dtype=object)
+    # Most entries of a mixed column are plain numbers; only the rest need the
+    # (much slower) string parsing
+    parsed = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    missing = series.isna().to_numpy(copy=True)
+    explicit_unit = np.zeros(len(series), dtype=bool)
+    converted = np.zeros(len(series), dtype=bool)
+    rest = np.flatnonzero(np.isnan(parsed) & ~missing)
+    if not len(rest):
+        return parsed, missing, explicit_unit, converted
+
+    text = series.iloc[rest].astype('string').str.strip().str.lower().fillna('')
+    missing[rest] = (text == '').to_numpy()
+    parts = text.str.extract(_NUMBER_WITH_UNIT)
+    numbers = pd.to_numeric(parts[0], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    units = parts[1].fillna('')
+    multipliers = units.map({'': 1.0, **UNIT_SUFFIXES.get(feature, {})}).to_numpy(dtype=np.float64, na_value=np.nan)
+    rest_parsed = numbers * multipliers
+    if feature in BOOLEAN_SPECS:
+        words = text.map(BOOLEAN_WORDS).to_numpy(dtype=np.float64, na_value=np.nan)
+        rest_parsed = np.where(np.isnan(words), rest_parsed, words)
+    parsed[rest] = rest_parsed
+    explicit_unit[rest] = (units != '').to_numpy()
+    converted[rest] = explicit_unit[rest] & (multipliers != 1)
+    return parsed, missing, explicit_unit, converted
+
+
+# Validate whole columns. Returns the normalised arrays of changed features,
+# the mask of kept rows and one bitmask array per issue.
+def validate_columns(columns, n_rows, on_out_of_range='clip', limits=BATCH_LIMITS):
+    if on_out_of_range not in ('clip', 'reject'):
+        raise ValueError(f"on_out_of_range must be 'clip' or 'reject', got {on_out_of_range!r}")
+    masks = {issue: np.zeros(n_rows, dtype=np.uint32) for issue in ISSUES}
+    normalised = {}
+    changed = set()
+    for i, feature in enumerate(RAW_FEATURES):
+        bit = np.uint32(1 << i)
+        column = np.asarray(columns[feature])
+        if column.dtype.kind in 'biuf':
+            values = column.astype(np.float64)
+            missing = np.isnan(values)
+            explicit_unit = converted = np.zeros(n_rows, dtype=bool)
+            if column.dtype != _canonical_dtype(feature):
+                # e.g. int32 from Parquet, or floats from a CSV column with gaps
+                changed.add(feature)
+        else:
+            values, missing, explicit_unit, converted = _parse_text(column, feature)
+            changed.add(feature)
+        not_numeric = ~missing & np.isnan(values)
+
+        if feature == 'ram':
+            in_gb = ~explicit_unit & (values > 0) & (values <= RAM_GB_MAX)
+            values = np.where(in_gb, values * 1024, values)
+            converted = converted | in_gb
+
+        low, high = limits[feature]
+        outside = (values < low) | (values > high)
+        if on_out_of_range == 'clip':
+            values = np.clip(values, low, high)
+            masks['clipped'][outside] |= bit
+        else:
+            masks['out_of_range'][outside] |= bit
+        masks['missing'][missing] |= bit
+        masks['not_numeric'][not_numeric] |= bit
+        masks['unit_converted'][converted] |= bit
+        # Integer columns without unit conversions can't hold fractions
+        if _canonical_dtype(feature).kind != 'f' and (column.dtype.kind not in 'biu' or converted.any()):
+            # Rejected out-of-range rows aren't reported as rounded too
+            rounded = (values != np.rint(values)) & ~np.isnan(values) & ~outside
+            masks['rounded'][rounded] |= bit
+            if rounded.any():
+                changed.add(feature)
+        if converted.any() or (on_out_of_range == 'clip' and outside.any()):
+            changed.add(feature)
+        normalised[feature] = values
+
+    rejected = np.zeros(n_rows, dtype=bool)
+    for issue in REJECTING_ISSUES:
+        rejected |= masks[issue] != 0
+    keep = ~rejected
+    out = {}
+    for feature in changed:
+        values = normalised[feature][keep]
+        dtype = _canonical_dtype(feature)
+        out[feature] = values if dtype.kind == 'f' else np.rint(values).astype(dtype)
+    return out, keep, masks
+
+
+# Text spec columns (CSV read without type inference) that hold only plain
+# numbers are cast in Arrow, which is much faster than parsing them here
+def _cast_text_columns(batch):
+    for feature in RAW_FEATURES:
+        index = batch.schema.get_field_index(feature)
+        if not pa.types.is_string(batch.schema.field(index).type):
+            continue
+        try:
+            column = batch.column(index).cast(pa.from_numpy_dtype(_canonical_dtype(feature)))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+        batch = batch.set_column(index, feature, column)
+    return batch
+
+
+# Human-readable issues per report row, e.g. "ram:unit_converted; pc:clipped"
+def describe(report):
+    parts = [[] for _ in range(len(report))]
+    for issue in ISSUES:
+        bits = report[issue].to_numpy()
+        for i, feature in enumerate(RAW_FEATURES):
+            for row in np.flatnonzero(bits & (1 << i)):
+                parts[row].append(f"{feature}:{issue}")
+    return pd.Series(["; ".join(p) for p in parts], index=report.index, dtype=object)
+
+
+# Validates a stream of chunks, numbering rows across chunks and keeping
+# per-feature issue counts for the whole stream
+class Validator:
+    def __init__(self, on_out_of_range='clip', limits=BATCH_LIMITS):
+        self.on_out_of_range = on_out_of_range
+        self.limits = limits
+        self.rows = 0
+        self.rejected = 0
+        self.counts = {issue: np.zeros(len(RAW_FEATURES), dtype=np.int64) for issue in ISSUES}
+
+    def _check_schema(self, names):
+        missing = [f for f in RAW_FEATURES if f not in names]
+        if missing:
+            raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+
+    def _report(self, keep, masks):
+        flagged = np.zeros(len(keep), dtype=bool)
+        for issue in ISSUES:
+            flagged |= masks[issue] != 0
+            bits = masks[issue][masks[issue] != 0]
+            for i in range(len(RAW_FEATURES)):
+                self.counts[issue][i] += np.count_nonzero(bits & (1 << i))
+        rows = np.flatnonzero(flagged)
+        report = pd.DataFrame({'row': self.rows + rows, 'rejected': ~keep[rows]})
+        for issue in ISSUES:
+            report[issue] = masks[issue][rows]
+        rejected = int(np.count_nonzero(~keep))
+        self.rows += len(keep)
+        self.rejected += rejected
+        VALIDATION_ROWS.inc(len(keep) - len(rows), result="clean")
+        VALIDATION_ROWS.inc(len(rows) - rejected, result="normalised")
+        VALIDATION_ROWS.inc(rejected, result="rejected")
+        return report
+
+    # DataFrame chunk -> (cleaned DataFrame of kept rows, report)
+    def validate_frame(self, df):
+        self._check_schema(df.columns)
+        columns = {f: df[f].to_numpy() for f in RAW_FEATURES}
+        normalised, keep, masks = validate_columns(columns, len(df), self.on_out_of_range, self.limits)
+        report = self._report(keep, masks)
+        out = df if keep.all() and not normalised else df[keep].copy()
+        for feature, values in normalised.items():
+            out[feature] = values
+        return out, report
+
+    # Arrow record batch -> (cleaned record batch of kept rows, report)
+    def validate_batch(self, batch):
+        self._check_schema(batch.schema.names)
+        batch = _cast_text_columns(batch)
+        columns = {f: batch.column(f).to_numpy(zero_copy_only=False) for f in RAW_FEATURES}
+        normalised, keep, masks = validate_columns(columns, batch.num_rows, self.on_out_of_range, self.limits)
+        report = self._report(keep, masks)
+        if not keep.all():
+            batch = batch.filter(pa.array(keep))
+        for feature, values in normalised.items():
+            batch = batch.set_column(batch.schema.get_field_index(feature), feature, pa.array(values))
+        # pandas metadata from the writer would restore the pre-validation dtypes
+        return batch.replace_schema_metadata(None), report
+
+    # Issue counts per feature for everything validated so far
+    def summary(self):
+        return {
+            issue: {RAW_FEATURES[i]: int(n) for i, n in enumerate(counts) if n}
+            for issue, counts in self.counts.items()
+        }